@@ -3,19 +3,79 @@ Phase 1D: JWT Token Creation and Validation
 Phase 1E: GitHub OAuth Flow
 """
 
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-from jose import jwt, JWTError
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, Tuple
+import asyncio
+import hashlib
+import logging
+import secrets
+import threading
+import time
+from cachetools import TTLCache
+from jose import jwk, jwt, JWTError
 from itsdangerous import URLSafeTimedSerializer
 import httpx
+import orjson
 from .config import settings
 
-# Phase 1E: Pending tokens for CLI polling (in production, use Redis with TTL)
-pending_tokens: Dict[str, Dict[str, Any]] = {}
+logger = logging.getLogger(__name__)
+
+# Phase 1E: Pending logins for CLI polling expire after the same 10 minute
+# window the OAuth state is valid for (stored by crud.store_pending_login)
+PENDING_TOKEN_TTL = 600
 
 # Phase 1E: State serializer for CSRF protection
 state_serializer = URLSafeTimedSerializer(settings.state_secret)
 
+# Part 1D: Signing and verification keys, parsed once at import
+# HS* algorithms share jwt_secret; asymmetric ones sign with the private PEM
+# and verify with the public PEM so verifiers never hold the signing secret
+if settings.jwt_algorithm.startswith("HS"):
+    _signing_key = _verification_key = settings.jwt_secret
+else:
+    _signing_key = jwk.construct(settings.jwt_private_key, settings.jwt_algorithm)
+    _verification_key = (
+        jwk.construct(settings.jwt_public_key, settings.jwt_algorithm)
+        if settings.jwt_public_key
+        else _signing_key.public_key()
+    )
+
+# Verified JWT payloads keyed by a hash of the token (never the raw token)
+# Access tokens only live 15 minutes, so entries can live up to 5 minutes;
+# a token's own expiry is still checked on every cache hit
+JWT_CACHE_TTL = 300
+_jwt_cache: TTLCache = TTLCache(maxsize=10_000, ttl=JWT_CACHE_TTL)
+_jwt_cache_lock = threading.Lock()
+
+# User each verified token resolved to, as (exp, user_id, sub), so requests
+# with a known token skip the user lookup-or-create and do a primary key get
+# (sub lets callers spot a deleted user's ID handed to someone new)
+_token_user_ids: TTLCache = TTLCache(maxsize=10_000, ttl=JWT_CACHE_TTL)
+
+def _token_key(token: str) -> bytes:
+    """Short, non-reversible cache key for a token."""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+# Phase 1E: Shared GitHub clients so logins reuse warm HTTP/2 connections
+# instead of paying a TCP+TLS handshake per request (closed on app shutdown)
+# (a dead GitHub host fails fast on connect instead of holding a worker 10s)
+_github_limits = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+_github_timeout = httpx.Timeout(10.0, connect=5.0)
+github_api_client = httpx.AsyncClient(
+    base_url="https://api.github.com",
+    http2=True,
+    timeout=_github_timeout,
+    limits=_github_limits,
+    headers={"Accept": "application/vnd.github.v3+json"},
+)
+github_oauth_client = httpx.AsyncClient(
+    base_url="https://github.com",
+    http2=True,
+    timeout=_github_timeout,
+    limits=_github_limits,
+    headers={"Accept": "application/json"},
+)
+
 def create_jwt_token(data: Dict[str, Any]) -> str:
     """
     Part 1D: Create a JWT token with user data
@@ -24,14 +84,17 @@ def create_jwt_token(data: Dict[str, Any]) -> str:
     # 1. Copy the user data
     to_encode = data.copy()
     
-    # 2. Add expiration (7 days from now)
-    expire = datetime.utcnow() + timedelta(days=settings.jwt_expiry_days)
+    # 2. Add expiration (15 minutes from now - the CLI refreshes it)
+    expire = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_ttl_minutes)
     to_encode.update({"exp": expire})
     
+    # Mark who issued the token and who it is for
+    to_encode.update({"iss": settings.base_url, "aud": settings.jwt_audience})
+    
     # Create the JWT token
     encoded_jwt = jwt.encode(
         to_encode, 
-        settings.jwt_secret, 
+        _signing_key, 
         algorithm=settings.jwt_algorithm
     )
     
@@ -42,19 +105,87 @@ def verify_jwt_token(token: str) -> Optional[Dict[str, Any]]:
     Part 1D: Check if a JWT token is valid
     Returns user data if valid, None if not
     """
+    # 1. Reuse a recent verification of the same token if it hasn't expired
+    key = _token_key(token)
+    with _jwt_cache_lock:
+        cached = _jwt_cache.get(key)
+    if cached is not None and cached.get("exp", 0) > time.time():
+        return cached
+
     try:
-        # 3. Decode and verify the token signature
+        # 2. Decode and verify the token signature
+        #    Tokens missing a claim, or issued by/for someone else, are
+        #    rejected by the library
         payload = jwt.decode(
             token, 
-            settings.jwt_secret, 
-            algorithms=[settings.jwt_algorithm]
+            _verification_key, 
+            algorithms=[settings.jwt_algorithm],
+            audience=settings.jwt_audience,
+            issuer=settings.base_url,
+            options={
+                "require_exp": True,
+                "require_sub": True,
+                "require_iss": True,
+                "require_aud": True,
+            }
         )
-        return payload
     except JWTError as e:
-        # Token is invalid (expired, wrong signature, etc.)
-        print(f"JWT verification failed: {e}")
+        # Token is invalid (expired, wrong signature, missing claims, etc.)
+        logger.debug("JWT verification failed: %s", e)
         return None
 
+    # 3. Remember the result (hits re-check exp, so it never outlives the token)
+    with _jwt_cache_lock:
+        _jwt_cache[key] = payload
+    return payload
+
+def cached_user_id(token: str) -> Optional[Tuple[int, str]]:
+    """
+    Return (user_id, sub) a still-valid token was last resolved to, if any.
+    Callers must check the user's github_id still matches sub.
+    """
+    with _jwt_cache_lock:
+        entry = _token_user_ids.get(_token_key(token))
+    if entry is not None and entry[0] > time.time():
+        return entry[1], entry[2]
+    return None
+
+def remember_user_id(token: str, payload: Dict[str, Any], user_id: int) -> None:
+    """Remember which user a verified token belongs to (until it expires)."""
+    with _jwt_cache_lock:
+        _token_user_ids[_token_key(token)] = (payload["exp"], user_id, payload["sub"])
+
+def forget_user_tokens(user_id: int) -> None:
+    """Forget every token resolved to a user (e.g. when they are deleted)."""
+    with _jwt_cache_lock:
+        stale = [key for key, entry in _token_user_ids.items() if entry[1] == user_id]
+        for key in stale:
+            _token_user_ids.pop(key, None)
+
+def invalidate_token(token: str) -> None:
+    """Forget everything cached for a token (e.g. on logout)."""
+    key = _token_key(token)
+    with _jwt_cache_lock:
+        _jwt_cache.pop(key, None)
+        _token_user_ids.pop(key, None)
+
+# Phase 1E: Pending logins waiting for the CLI to collect them
+def pending_key(cli_token: str) -> str:
+    """
+    Lookup key for a CLI token's pending login.
+    A hash, so a cli_token seen in a log or URL is not itself the key.
+    """
+    return hashlib.sha256(cli_token.encode()).hexdigest()
+
+# Refresh tokens: random strings we hand to the CLI, stored only as hashes
+def create_refresh_token() -> str:
+    """Generate a new unguessable refresh token."""
+    return secrets.token_urlsafe(32)
+
+def hash_refresh_token(token: str) -> str:
+    """Hash a refresh token for storage and lookup."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
 # Part 1E: OAuth State Management (prevents CSRF attacks)
 def create_state(cli_token: str) -> str:
     """
@@ -76,32 +207,24 @@ def verify_state(state: str, max_age: int = 600) -> Optional[Dict[str, Any]]:
 # Phase 1E: GitHub API Helper
 async def get_github_user(access_token: str) -> Optional[Dict[str, Any]]:
     """Get user info from GitHub using access token."""
-    async with httpx.AsyncClient() as client:
-        # Get user info
-        resp = await client.get(
-            "https://api.github.com/user",
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Accept": "application/vnd.github.v3+json"
-            }
-        )
-        if resp.status_code != 200:
-            return None
-        user = resp.json()
-        
-        # Get primary verified email
-        resp = await client.get(
-            "https://api.github.com/user/emails",
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Accept": "application/vnd.github.v3+json"
-            }
-        )
-        if resp.status_code == 200:
-            emails = resp.json()
-            for email in emails:
-                if email.get("primary") and email.get("verified"):
-                    user["email"] = email["email"]
-                    break
-        
-        return user
+    # (the client already sends the GitHub v3 Accept header)
+    headers = {"Authorization": f"Bearer {access_token}"}
+    
+    # Get user info and emails at the same time (they don't depend on each other)
+    resp, emails_resp = await asyncio.gather(
+        github_api_client.get("/user", headers=headers),
+        github_api_client.get("/user/emails", headers=headers),
+    )
+    if resp.status_code != 200:
+        return None
+    user = orjson.loads(resp.content)
+    
+    # Get primary verified email
+    if emails_resp.status_code == 200:
+        emails = orjson.loads(emails_resp.content)
+        for email in emails:
+            if email.get("primary") and email.get("verified"):
+                user["email"] = email["email"]
+                break
+    
+    return user
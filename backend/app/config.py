@@ -3,8 +3,9 @@ Part 1C: Environment Configuration
 Loads settings from .env file automatically
 """
 
-from pydantic_settings import BaseSettings
-from typing import List
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
+from typing import Annotated, FrozenSet, Literal
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
@@ -15,26 +16,43 @@ class Settings(BaseSettings):
     
     # Server config
     base_url: str = "http://localhost:8001"
+    # "development" enables the /config-test, /test-token and /test-protected endpoints
+    env: Literal["development", "production"] = "production"
+    # Log every SQL statement (slow - for debugging only)
+    debug: bool = False
     
     # Part 1D: Secrets for signing JWT tokens
     jwt_secret: str = "dev-jwt-secret-change-in-production"
     state_secret: str = "dev-state-secret-change-in-production"
     jwt_algorithm: str = "HS256"
-    jwt_expiry_days: int = 7
+    # Asymmetric signing (e.g. ES256/RS256): PEM keys used instead of jwt_secret.
+    # Verifiers only need the public key; it is derived from the private key if unset
+    jwt_private_key: str = ""
+    jwt_public_key: str = ""
+    # Short-lived access tokens; the CLI renews them with a refresh token
+    access_token_ttl_minutes: int = 15
+    refresh_token_ttl_days: int = 30
+    # Audience claim for tokens we issue (the issuer claim is base_url)
+    jwt_audience: str = "secret-share-cli"
     
-    # Admin emails (will be parsed from comma-separated string)
-    admin_emails: str = ""
+    # Admin emails, parsed once at startup from a comma-separated string
+    admin_emails: Annotated[FrozenSet[str], NoDecode] = frozenset()
     
-    class Config:
+    model_config = SettingsConfigDict(
         # Load from .env file
-        env_file = ".env"
-        env_file_encoding = 'utf-8'
+        env_file=".env",
+        env_file_encoding="utf-8",
+        # Settings never change at runtime
+        frozen=True,
+    )
     
-    def get_admin_emails_list(self) -> List[str]:
-        """Parse admin emails from comma-separated string."""
-        if self.admin_emails:
-            return [email.strip() for email in self.admin_emails.split(",")]
-        return []
+    @field_validator("admin_emails", mode="before")
+    @classmethod
+    def parse_admin_emails(cls, value):
+        """Split "a@x.com, b@y.com" into {"a@x.com", "b@y.com"}."""
+        if isinstance(value, str):
+            return frozenset(email.strip() for email in value.split(",") if email.strip())
+        return value
 
 # Create a single instance to use throughout the app
 settings = Settings()
\ No newline at end of file
@@ -1,210 +1,345 @@
-from sqlmodel import Session, select
-from typing import Optional, List
-from datetime import datetime
+from sqlmodel import Session, select, delete, and_, or_
+from typing import Any, Callable, Dict, Iterator, Optional, List, Tuple
+from datetime import timedelta
+from enum import Enum
+import threading
+import orjson
+from cachetools import LRUCache, TTLCache
+from sqlalchemy import func, insert, true
+from sqlalchemy.orm import raiseload
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
-from .models import User, Secret, ACL, Organization, Team, TeamMembership
+from .models import User, Secret, ACL, Organization, Team, TeamMembership, RefreshToken, PendingLogin, utc_now
+from .auth import PENDING_TOKEN_TTL, create_refresh_token, forget_user_tokens, hash_refresh_token, pending_key
+from .config import settings
 
 def create_secret(
     session: Session,
     user: User, 
     key: str,
     value: str,
-    acl_entries: Optional[List[dict]] = None
+    acl_entries: Optional[list] = None
 ) -> Secret:
     """
     Create a new secret with default ACL for creator.
     This is how users store their secrets in the database.
+    acl_entries are ACLEntry request models (read by attribute).
     """
     # 1. Create the secret object with user's organization
+    #    (one timestamp so created_at and updated_at match exactly)
+    now = utc_now()
     secret = Secret(
         organization_id=user.organization_id,
         key=key,
         value=value,
         created_by_id=user.id,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
+        created_at=now,
+        updated_at=now
     )
     
-    # 2. Save secret to database
+    # 2. Save secret to database (flush only - we just need its ID)
     session.add(secret)
+    session.flush()
+    
+    # 3. Give creator full access (read + write), then add any additional
+    #    permissions (sharing with teams/users)
+    rows = [{
+        "secret_id": secret.id,
+        "subject_type": "user",
+        "subject_id": user.id,
+        "can_read": True,
+        "can_write": True
+    }]
+    for entry in acl_entries or []:
+        rows.append({
+            "secret_id": secret.id,
+            "subject_type": entry.subject_type,  # 'user', 'team', or 'org'
+            "subject_id": entry.subject_id,      # ID of user/team
+            "can_read": entry.can_read,
+            "can_write": entry.can_write
+        })
+    
+    # 4. Insert all ACL entries in one batched statement and save everything
+    #    in a single transaction
+    session.execute(insert(ACL), rows)
     session.commit()
-    session.refresh(secret)  # Get the generated ID
-    
-    # 3. Give creator full access (read + write)
-    creator_acl = ACL(
-        secret_id=secret.id,
-        subject_type="user",
-        subject_id=user.id,
-        can_read=True,
-        can_write=True
+    return secret
+
+def _org_secret_filters(user: User, query: Optional[str] = None) -> list:
+    """WHERE conditions for the user's org's secrets, matching the search."""
+    # 1. Only secrets in the user's organization
+    filters = [Secret.organization_id == user.organization_id]
+    
+    # 2. Apply search filter if user is searching
+    #    (escaped so "_" and "%" in a key name match literally)
+    if query:
+        filters.append(Secret.key.contains(query, autoescape=True))
+    return filters
+
+def _acl_grants_cte(user: User):
+    """
+    CTE of (secret_id, can_read, can_write): for every secret with a user,
+    team or org rule that applies to the user, whether any of those rules
+    grants read and whether any grants write.
+    """
+    team_ids = select(TeamMembership.team_id).where(TeamMembership.user_id == user.id)
+    return (
+        select(
+            ACL.secret_id,
+            func.max(ACL.can_read).label("can_read"),
+            func.max(ACL.can_write).label("can_write"),
+        )
+        .where(or_(
+            and_(ACL.subject_type == "user", ACL.subject_id == user.id),
+            ACL.subject_type == "org",
+            and_(ACL.subject_type == "team", ACL.subject_id.in_(team_ids))
+        ))
+        .group_by(ACL.secret_id)
+        .cte("grants")
     )
-    session.add(creator_acl)
-    
-    # 4. Add any additional permissions (sharing with teams/users)
-    if acl_entries:
-        for entry in acl_entries:
-            acl = ACL(
-                secret_id=secret.id,
-                subject_type=entry.get("subject_type"),  # 'user', 'team', or 'org'
-                subject_id=entry.get("subject_id"),      # ID of user/team
-                can_read=entry.get("can_read", True),
-                can_write=entry.get("can_write", False)
-            )
-            session.add(acl)
+
+def _secret_rows_query(
+    user: User,
+    query: Optional[str] = None,
+    include_values: bool = True
+):
+    """
+    SELECT just the columns the secrets list shows, plus the creator's name,
+    whether the user can write each secret, and its ACL as a JSON string.
+    Without include_values the (possibly large) value column isn't read.
+    """
+    # 1. Read/write access: admins have both on everything in their org;
+    #    others get them as creator or from the ACL rules that apply to them,
+    #    which are read once and folded into one grants row per secret
+    filters = _org_secret_filters(user, query)
+    if user.is_admin:
+        grants = None
+        can_write = true()
+    else:
+        grants = _acl_grants_cte(user)
+        filters.append(or_(
+            Secret.created_by_id == user.id,
+            func.coalesce(grants.c.can_read, False) == True
+        ))
+        can_write = or_(
+            Secret.created_by_id == user.id,
+            func.coalesce(grants.c.can_write, False) == True
+        )
     
-    # 5. Save all ACL entries
-    session.commit()
-    return secret
+    # 2. Each secret's ACL rows, aggregated by SQLite into one JSON array of
+    #    [subject_type, subject_id, can_write] per secret (read via ix_acl_lookup)
+    acl = (
+        select(func.json_group_array(
+            func.json_array(ACL.subject_type, ACL.subject_id, ACL.can_write)
+        ))
+        .where(ACL.secret_id == Secret.id)
+        .scalar_subquery()
+    )
+    
+    # 3. Project the response columns (no Secret or ACL objects are built)
+    columns = [Secret.id, Secret.key]
+    if include_values:
+        columns.append(Secret.value)
+    stmt = (
+        select(
+            *columns,
+            Secret.created_at,
+            Secret.created_by_id.label("created_by"),
+            User.name.label("created_by_name"),
+            can_write.label("can_write"),
+            acl.label("acl"),
+        )
+        .outerjoin(User, User.id == Secret.created_by_id)
+    )
+    if grants is not None:
+        stmt = stmt.outerjoin(grants, grants.c.secret_id == Secret.id)
+    return stmt.where(*filters)
 
-def list_secrets(
+def list_secret_rows(
     session: Session,
     user: User,
-    query: Optional[str] = None
-) -> List[Secret]:
+    query: Optional[str] = None,
+    include_values: bool = True
+) -> List[dict]:
     """
-    List all secrets the user can read.
+    List all secrets the user can read as plain dicts, in one query.
     This is what shows up in the CLI secrets list.
     """
-    # 1. Get all secrets in the user's organization
-    stmt = select(Secret).where(Secret.organization_id == user.organization_id)
-    
-    # 2. Apply search filter if user is searching
-    if query:
-        stmt = stmt.where(Secret.key.contains(query))
-    
-    # 3. Execute the database query
-    secrets = session.exec(stmt).all()
-    
-    # 4. Filter to only secrets user has permission to read
-    readable_secrets = []
-    for secret in secrets:
-        if can_read_secret(session, user, secret):
-            readable_secrets.append(secret)
-    
-    return readable_secrets
+    stmt = _secret_rows_query(user, query, include_values)
+    return [dict(row) for row in session.execute(stmt).mappings()]
+
+def iter_secret_rows(
+    session: Session,
+    user: User,
+    query: Optional[str] = None,
+    include_values: bool = True,
+    batch_size: int = 500
+) -> Iterator[List[dict]]:
+    """
+    Same rows as list_secret_rows, fetched batch_size rows at a time.
+    Used for streaming, so memory stays flat however many secrets there are.
+    """
+    stmt = _secret_rows_query(user, query, include_values)
+    stmt = stmt.execution_options(yield_per=batch_size)
+    for batch in session.execute(stmt).mappings().partitions():
+        yield [dict(row) for row in batch]
+
+def users_by_id(session: Session, user_ids) -> Dict[int, User]:
+    """Load many users in one query, keyed by ID."""
+    if not user_ids:
+        return {}
+    return {user.id: user for user in session.exec(select(User).where(User.id.in_(user_ids)))}
+
+def teams_by_id(session: Session, team_ids) -> Dict[int, Team]:
+    """Load many teams in one query, keyed by ID."""
+    if not team_ids:
+        return {}
+    return {team.id: team for team in session.exec(select(Team).where(Team.id.in_(team_ids)))}
+
+class SecretAccess(str, Enum):
+    """Why get_secret/update_secret did or didn't return a secret."""
+    OK = "ok"
+    NOT_FOUND = "not_found"
+    FORBIDDEN = "forbidden"
 
 def get_secret(
     session: Session,
     secret_id: int,
     user: User
-) -> Optional[Secret]:
+) -> Tuple[Optional[Secret], SecretAccess, bool]:
     """
-    Get a specific secret if user can read it.
-    Returns None if secret doesn't exist or user can't access it.
+    Get a specific secret if user can read it, and whether they can write it.
+    Returns (secret, OK, can_write), or (None, NOT_FOUND/FORBIDDEN, False) so
+    callers can pick the right error without loading the secret again.
     """
-    # 1. Try to get the secret from database
-    secret = session.get(Secret, secret_id)
-    
-    # 2. Check if secret exists
-    if not secret:
-        return None
+    # 1. Read/write access decided by the database alongside the row:
+    #    admins have both in their org, creators have both, others need
+    #    a matching ACL rule (same rules as _secret_rows_query)
+    if user.is_admin:
+        can_read = can_write = true()
+    else:
+        can_read = or_(
+            Secret.created_by_id == user.id,
+            _acl_grant_exists(user, Secret.id, ACL.can_read)
+        )
+        can_write = or_(
+            Secret.created_by_id == user.id,
+            _acl_grant_exists(user, Secret.id, ACL.can_write)
+        )
     
-    # 3. Check if secret is in user's organization
-    if secret.organization_id != user.organization_id:
-        return None
+    # 2. Fetch the secret and both answers in one query
+    #    (other orgs' secrets count as not found)
+    stmt = select(Secret, can_read, can_write).where(
+        Secret.id == secret_id,
+        Secret.organization_id == user.organization_id
+    )
+    row = session.exec(stmt).first()
+    if row is None:
+        return None, SecretAccess.NOT_FOUND, False
     
-    # 4. Check if user has read permission
-    if not can_read_secret(session, user, secret):
-        return None
+    # 3. Check if user has read permission
+    secret, readable, writable = row
+    if not readable:
+        return None, SecretAccess.FORBIDDEN, False
     
-    return secret
+    return secret, SecretAccess.OK, bool(writable)
 
 def update_secret(
     session: Session,
     secret_id: int,
     user: User,
     value: Optional[str] = None,
-    acl_entries: Optional[List[dict]] = None
-) -> Optional[Secret]:
+    acl_entries: Optional[list] = None
+) -> Tuple[Optional[Secret], SecretAccess]:
     """
     Update a secret's value or permissions if user can write.
     Used when user wants to change secret value or share it.
+    acl_entries are ACLEntry request models, like in create_secret.
+    Returns (secret, OK), or (None, NOT_FOUND/FORBIDDEN).
     """
     # 1. Get the secret from database
     secret = session.get(Secret, secret_id)
     
     if not secret:
-        return None
+        return None, SecretAccess.NOT_FOUND
     
     # 2. Check if user has write permission
     if not can_write_secret(session, user, secret):
-        return None
+        return None, SecretAccess.FORBIDDEN
     
     # 3. Update the secret value if provided
     if value is not None:
         secret.value = value
-        secret.updated_at = datetime.utcnow()
+        secret.updated_at = utc_now()
     
     # 4. Update permissions if provided
     if acl_entries is not None:
         # 4a. Delete existing ACL except creator's (creator always keeps access)
-        stmt = select(ACL).where(
-            ACL.secret_id == secret_id,
-            ACL.subject_type != "user" or ACL.subject_id != secret.created_by_id
+        #     in a single DELETE statement
+        session.exec(
+            delete(ACL).where(
+                ACL.secret_id == secret_id,
+                or_(ACL.subject_type != "user", ACL.subject_id != secret.created_by_id)
+            )
         )
-        existing_acls = session.exec(stmt).all()
-        for acl in existing_acls:
-            session.delete(acl)
         
-        # 4b. Add new ACL entries
-        for entry in acl_entries:
-            acl = ACL(
-                secret_id=secret.id,
-                subject_type=entry.get("subject_type"),
-                subject_id=entry.get("subject_id"),
-                can_read=entry.get("can_read", True),
-                can_write=entry.get("can_write", False)
-            )
-            session.add(acl)
+        # 4b. Add new ACL entries in one batched statement, like create_secret
+        #     (an empty executemany would insert a blank row, so skip it)
+        rows = [{
+            "secret_id": secret.id,
+            "subject_type": entry.subject_type,
+            "subject_id": entry.subject_id,
+            "can_read": entry.can_read,
+            "can_write": entry.can_write
+        } for entry in acl_entries]
+        if rows:
+            session.execute(insert(ACL), rows)
     
     # 5. Save changes to database
     session.commit()
-    session.refresh(secret)
-    return secret
+    return secret, SecretAccess.OK
 
-def can_read_secret(
+def _acl_grants(
     session: Session,
     user: User,
-    secret: Secret
+    secret: Secret,
+    permission
 ) -> bool:
     """
-    Check if user can read a secret.
-    This is our permission system - determines who sees what.
+    Check the ACL for a matching user, team or org rule in one query.
+    `permission` is the ACL column to test (ACL.can_read or ACL.can_write).
     """
-    # 1. Admins can read everything in their org
-    if user.is_admin and user.organization_id == secret.organization_id:
-        return True
-    
-    # 2. Creator can always read their own secrets
-    if secret.created_by_id == user.id:
-        return True
-    
-    # 3. Check ACL (Access Control List) entries
-    stmt = select(ACL).where(ACL.secret_id == secret.id)
-    acl_entries = session.exec(stmt).all()
-    
-    for acl in acl_entries:
-        # 3a. Check if user has direct read permission
-        if acl.subject_type == "user" and acl.subject_id == user.id and acl.can_read:
-            return True
-        
-        # 3b. Check if entire org has read permission
-        if acl.subject_type == "org" and acl.can_read:
-            return True
-        
-        # 3c. Check if user's team has read permission
-        if acl.subject_type == "team":
-            # Check if user is member of this team
-            stmt = select(TeamMembership).where(
-                TeamMembership.team_id == acl.subject_id,
+    return session.exec(select(_acl_grant_exists(user, secret.id, permission))).one()
+
+def _acl_grant_exists(user: User, secret_id, permission):
+    """
+    EXISTS clause for "some user, team or org rule on secret_id grants
+    `permission` to user". secret_id may be a value or a column (Secret.id)
+    to check every secret of an outer query.
+    """
+    # 1. Join the user's membership onto team rules so all three
+    #    subject types can be decided by the database at once
+    return (
+        select(ACL.id)
+        .outerjoin(
+            TeamMembership,
+            and_(
+                TeamMembership.team_id == ACL.subject_id,
                 TeamMembership.user_id == user.id
             )
-            membership = session.exec(stmt).first()
-            if membership and acl.can_read:
-                return True
-    
-    # 4. No permission found
-    return False
+        )
+        .where(
+            ACL.secret_id == secret_id,
+            permission == True,
+            or_(
+                and_(ACL.subject_type == "user", ACL.subject_id == user.id),  # Direct share
+                ACL.subject_type == "org",                                    # Whole org
+                and_(ACL.subject_type == "team", TeamMembership.id.is_not(None))  # User's team
+            )
+        )
+        # 2. Any matching row grants the permission
+        .exists()
+    )
 
 def can_write_secret(
     session: Session,
@@ -213,7 +348,7 @@ def can_write_secret(
 ) -> bool:
     """
     Check if user can write to a secret.
-    Similar to can_read but for write permissions.
+    Creators and org admins can always write; others need an ACL write rule.
     """
     # 1. Creator can always write to their own secrets
     if secret.created_by_id == user.id:
@@ -223,31 +358,20 @@ def can_write_secret(
     if user.is_admin and user.organization_id == secret.organization_id:
         return True
     
-    # 3. Check ACL entries for write permission
-    stmt = select(ACL).where(ACL.secret_id == secret.id)
-    acl_entries = session.exec(stmt).all()
-    
-    for acl in acl_entries:
-        # 3a. Check if user has direct write permission
-        if acl.subject_type == "user" and acl.subject_id == user.id and acl.can_write:
-            return True
-        
-        # 3b. Check if entire org has write permission
-        if acl.subject_type == "org" and acl.can_write:
-            return True
-        
-        # 3c. Check if user's team has write permission
-        if acl.subject_type == "team":
-            stmt = select(TeamMembership).where(
-                TeamMembership.team_id == acl.subject_id,
-                TeamMembership.user_id == user.id
-            )
-            membership = session.exec(stmt).first()
-            if membership and acl.can_write:
-                return True
-    
-    # 4. No write permission found
-    return False
+    # 3. Check ACL entries for user, team or org write access
+    return _acl_grants(session, user, secret, ACL.can_write)
+
+# User IDs by GitHub ID, so repeat logins skip the lookup query
+_user_id_by_github: LRUCache = LRUCache(maxsize=4096)
+_user_id_lock = threading.Lock()
+
+# Run with the org ID after a login creates a user, so main can drop that
+# org's cached listings (crud can't import main)
+_user_created_listeners: List[Callable[[int], None]] = []
+
+def on_user_created(listener: Callable[[int], None]) -> None:
+    """Call listener(org_id) whenever a login creates a new user."""
+    _user_created_listeners.append(listener)
 
 def get_or_create_user(
     session: Session,
@@ -259,6 +383,62 @@ def get_or_create_user(
     Get existing user or create new one.
     Used during login to ensure user exists in our database.
     """
+    # 1. Seen this GitHub account before: load it by primary key
+    #    (the github_id check guards against a deleted user's reused ID)
+    with _user_id_lock:
+        cached_id = _user_id_by_github.get(github_id)
+    if cached_id is not None:
+        user = session.get(User, cached_id)
+        if user and user.github_id == github_id:
+            return user
+    
+    user = _find_or_create_user(session, email, name, github_id)
+    with _user_id_lock:
+        _user_id_by_github[github_id] = user.id
+    return user
+
+# Loaded user rows by ID, so authenticated requests with a known token don't
+# query the user table at all; kept short so changes made by another worker
+# (or directly in the database) still show up within a minute
+USER_CACHE_TTL = 60
+_users_by_id: TTLCache = TTLCache(maxsize=50_000, ttl=USER_CACHE_TTL)
+
+def load_user(session: Session, user_id: int, github_id: str) -> Optional[User]:
+    """
+    Get a user by ID, from the cache when possible, but only if they are
+    still the GitHub account github_id (a deleted user's ID can be reused).
+    Cached rows are merged into the session without a query, so callers get
+    an object they can use (and change) like any other loaded user.
+    """
+    with _user_id_lock:
+        cached = _users_by_id.get(user_id)
+    if cached is not None and cached.github_id == github_id:
+        return session.merge(cached, load=False)
+    
+    user = session.get(User, user_id)
+    if not user or user.github_id != github_id:
+        return None
+    with _user_id_lock:
+        _users_by_id[user_id] = user
+    return user
+
+def forget_user(user: User) -> None:
+    """
+    Drop a user from the caches, including the tokens resolved to them
+    (call after changing or deleting them).
+    """
+    with _user_id_lock:
+        _user_id_by_github.pop(user.github_id, None)
+        _users_by_id.pop(user.id, None)
+    forget_user_tokens(user.id)
+
+def _find_or_create_user(
+    session: Session,
+    email: str,
+    name: str,
+    github_id: str
+) -> User:
+    """The uncached part of get_or_create_user."""
     # 1. Check if user already exists (by GitHub ID or email for testing)
     stmt = select(User).where(
         (User.github_id == github_id) | (User.email == email)
@@ -271,34 +451,57 @@ def get_or_create_user(
             user.github_id = github_id
             session.add(user)
             session.commit()
+            with _user_id_lock:
+                _users_by_id.pop(user.id, None)
         return user
     
-    # 2. Create default organization if this is the first user
-    stmt = select(Organization)
-    org = session.exec(stmt).first()
-    if not org:
-        org = Organization(name="Default Organization")
-        session.add(org)
-        session.commit()
-        session.refresh(org)
-    
-    # 3. Create new user in the organization
-    user = User(
+    # 2. Find the organization new users join (created at startup)
+    org_id = ensure_default_organization(session)
+    
+    # 3. Insert the new user in one statement; if a concurrent login already
+    #    inserted the same email, the conflict turns into an update and we
+    #    get that row back instead of an IntegrityError
+    stmt = sqlite_insert(User).values(
         email=email,
         name=name,
         github_id=github_id,
-        organization_id=org.id,
+        organization_id=org_id,
         is_admin=False,  # Set to True for first user in production
-        created_at=datetime.utcnow()
+        created_at=utc_now()
     )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["email"],
+        set_={"github_id": stmt.excluded.github_id}
+    ).returning(User)
+    user = session.scalars(stmt).one()
     
-    # 4. Save user to database
-    session.add(user)
+    # 4. Save user to database, then let cached org listings know
     session.commit()
-    session.refresh(user)
+    for listener in _user_created_listeners:
+        listener(org_id)
     
     return user
 
+def ensure_default_organization(session: Session) -> int:
+    """
+    Return the ID of the organization new users join, creating it if needed.
+    Runs at startup so logins never race to create it.
+    """
+    # 1. Use the existing organization if there is one
+    org_id = session.exec(select(Organization.id).limit(1)).first()
+    if org_id is not None:
+        return org_id
+    
+    # 2. Otherwise insert the default one - the unique name means two
+    #    callers can't both create it
+    session.exec(
+        sqlite_insert(Organization)
+        .values(name="Default Organization", created_at=utc_now())
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    session.commit()
+    return session.exec(select(Organization.id).limit(1)).first()
+
 def create_team(
     session: Session,
     name: str,
@@ -312,13 +515,12 @@ def create_team(
     team = Team(
         name=name,
         organization_id=org_id,
-        created_at=datetime.utcnow()
+        created_at=utc_now()
     )
     
     # 2. Save team to database
     session.add(team)
     session.commit()
-    session.refresh(team)  # Get the generated ID
     
     return team
 
@@ -328,11 +530,28 @@ def get_org_teams(session: Session, org_id: int) -> List[Team]:
     Used to display available teams in the UI.
     """
     # 1. Query all teams that belong to this organization
-    stmt = select(Team).where(Team.organization_id == org_id)
+    #    (lists never need a team's relationships - touching one raises)
+    stmt = select(Team).where(Team.organization_id == org_id).options(raiseload("*"))
     
     # 2. Execute query and return all teams
     return session.exec(stmt).all()
 
+def get_team_in_org(session: Session, team_id: int, org_id: int) -> Optional[Team]:
+    """
+    Get one team, but only if it belongs to the organization.
+    Returns None for missing teams and teams in other orgs alike.
+    """
+    stmt = select(Team).where(Team.id == team_id, Team.organization_id == org_id)
+    return session.exec(stmt).first()
+
+def get_user_in_org(session: Session, user_id: int, org_id: int) -> Optional[User]:
+    """
+    Get one user, but only if they belong to the organization.
+    Returns None for missing users and users in other orgs alike.
+    """
+    stmt = select(User).where(User.id == user_id, User.organization_id == org_id)
+    return session.exec(stmt).first()
+
 def add_team_member(
     session: Session,
     team_id: int,
@@ -342,27 +561,24 @@ def add_team_member(
     Add a user to a team.
     Prevents duplicate memberships - if user is already in team, returns existing.
     """
-    # 1. Check if user is already a member of this team
-    stmt = select(TeamMembership).where(
-        TeamMembership.team_id == team_id,
-        TeamMembership.user_id == user_id
+    # 1. Insert the membership, letting the unique (user_id, team_id) index
+    #    skip it if the user is already a member - one round trip, no race
+    stmt = (
+        sqlite_insert(TeamMembership)
+        .values(team_id=team_id, user_id=user_id)
+        .on_conflict_do_nothing(index_elements=["user_id", "team_id"])
+        .returning(TeamMembership)
     )
-    existing = session.exec(stmt).first()
-    
-    # 2. If already a member, return existing membership
-    if existing:
-        return existing
-    
-    # 3. Create new membership linking user to team
-    membership = TeamMembership(
-        team_id=team_id,
-        user_id=user_id
-    )
-    
-    # 4. Save membership to database
-    session.add(membership)
+    membership = session.scalars(stmt).first()
     session.commit()
-    session.refresh(membership)
+    
+    # 2. Nothing inserted means they were already a member - return existing
+    if membership is None:
+        stmt = select(TeamMembership).where(
+            TeamMembership.team_id == team_id,
+            TeamMembership.user_id == user_id
+        )
+        membership = session.exec(stmt).first()
     
     return membership
 
@@ -374,20 +590,130 @@ def get_user_teams(session: Session, user_id: int) -> List[Team]:
     # 1. Join Team and TeamMembership tables to find user's teams
     stmt = select(Team).join(TeamMembership).where(
         TeamMembership.user_id == user_id
-    )
+    ).options(raiseload("*"))
     
     # 2. Execute query and return all teams user belongs to
     return session.exec(stmt).all()
 
-def get_team_members(session: Session, team_id: int) -> List[User]:
+# The user fields the CLI shows in user and member lists
+USER_SUMMARY_COLUMNS = (User.id, User.name, User.email, User.is_admin)
+
+def get_team_members(session: Session, team_id: int) -> List[dict]:
     """
-    Get all members of a team.
+    Get all members of a team (as USER_SUMMARY_COLUMNS dicts).
     Used to display team roster in the UI.
     """
     # 1. Join User and TeamMembership tables to find team members
-    stmt = select(User).join(TeamMembership).where(
+    stmt = select(*USER_SUMMARY_COLUMNS).join(TeamMembership).where(
         TeamMembership.team_id == team_id
     )
     
     # 2. Execute query and return all users in the team
-    return session.exec(stmt).all()
\ No newline at end of file
+    return [dict(row) for row in session.execute(stmt).mappings()]
+
+def get_org_users(session: Session, org_id: int) -> List[dict]:
+    """
+    Get all users in an organization (as USER_SUMMARY_COLUMNS dicts).
+    Used for picking users to add to teams or share with.
+    """
+    stmt = select(*USER_SUMMARY_COLUMNS).where(User.organization_id == org_id)
+    return [dict(row) for row in session.execute(stmt).mappings()]
+
+def issue_refresh_token(session: Session, user: User) -> str:
+    """
+    Create a refresh token for a user.
+    The raw token goes to the CLI; only its hash is saved.
+    Also clears out tokens that expired without being used.
+    """
+    # 1. Drop expired leftovers (uses the expires_at index)
+    now = utc_now()
+    session.exec(delete(RefreshToken).where(RefreshToken.expires_at < now))
+    
+    # 2. Generate the token and remember its hash with an expiry
+    token = create_refresh_token()
+    session.add(RefreshToken(
+        user_id=user.id,
+        token_hash=hash_refresh_token(token),
+        expires_at=now + timedelta(days=settings.refresh_token_ttl_days),
+        created_at=now
+    ))
+    
+    # 3. Save to database
+    session.commit()
+    return token
+
+def rotate_refresh_token(
+    session: Session,
+    token: str
+) -> Optional[Tuple[User, str]]:
+    """
+    Trade a refresh token for a new one (each token works once).
+    Returns (user, new_token), or None if the token is unknown or expired.
+    """
+    # 1. Remove the stored hash and read it back in one statement, so of two
+    #    concurrent refreshes with the same token exactly one gets the row
+    stmt = (
+        delete(RefreshToken)
+        .where(RefreshToken.token_hash == hash_refresh_token(token))
+        .returning(RefreshToken.user_id, RefreshToken.expires_at, RefreshToken.created_at)
+    )
+    stored = session.execute(stmt).first()
+    session.commit()
+    if not stored:
+        return None
+    
+    # 2. Used or expired tokens are gone either way
+    if stored.expires_at < utc_now():
+        return None
+    
+    # 3. Make sure the user still exists - and is the same user: SQLite can
+    #    hand a deleted user's ID to someone new, who joined after the token
+    user = session.get(User, stored.user_id)
+    if not user or user.created_at > stored.created_at:
+        return None
+    
+    # 4. Hand out a replacement
+    return user, issue_refresh_token(session, user)
+
+def revoke_refresh_tokens(session: Session, user_ids) -> None:
+    """
+    Delete every refresh token of the given users (call when deleting them).
+    Part of the caller's transaction; the caller commits.
+    """
+    session.exec(delete(RefreshToken).where(RefreshToken.user_id.in_(user_ids)))
+
+def store_pending_login(session: Session, cli_token: str, data: Dict[str, Any]) -> None:
+    """
+    Keep a finished login until the CLI polls for it.
+    Also clears out logins that expired without being collected.
+    """
+    # 1. Drop expired leftovers (uses the expires_at index)
+    now = utc_now()
+    session.exec(delete(PendingLogin).where(PendingLogin.expires_at <= now))
+    
+    # 2. Save this login; a retried callback replaces the earlier one
+    stmt = sqlite_insert(PendingLogin).values(
+        key=pending_key(cli_token),
+        data=orjson.dumps(data),
+        expires_at=now + timedelta(seconds=PENDING_TOKEN_TTL)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["key"],
+        set_={"data": stmt.excluded.data, "expires_at": stmt.excluded.expires_at}
+    )
+    session.exec(stmt)
+    session.commit()
+
+def take_pending_login(session: Session, cli_token: str) -> Optional[Dict[str, Any]]:
+    """
+    Remove and return a finished login (each one can be taken once).
+    The delete returns the row, so two polls can't both collect it.
+    """
+    stmt = (
+        delete(PendingLogin)
+        .where(PendingLogin.key == pending_key(cli_token), PendingLogin.expires_at > utc_now())
+        .returning(PendingLogin.data)
+    )
+    data = session.execute(stmt).scalar_one_or_none()
+    session.commit()
+    return orjson.loads(data) if data is not None else None
@@ -1,17 +1,29 @@
-from typing import Optional, List
+from typing import Dict, Optional, List
+import hashlib
+import html
+import threading
 import time
-
-import httpx
-from fastapi import FastAPI, Header, HTTPException, Query, Depends
-from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlmodel import Session, SQLModel, create_engine, select
-from pydantic import BaseModel
+from urllib.parse import urlencode
+
+from fastapi import APIRouter, FastAPI, Header, HTTPException, Query, Depends, Request, Response
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse, StreamingResponse
+from sqlmodel import Session, SQLModel, create_engine, delete, select
+from pydantic import BaseModel, ConfigDict
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import event, func
+from sqlalchemy.exc import OperationalError
+import anyio
+import orjson
+from cachetools import TTLCache
 
 from .auth import create_state  # Phase 1D & 1E
 from .auth import (
+    cached_user_id,
     create_jwt_token,
     get_github_user,
-    pending_tokens,
+    github_api_client,
+    github_oauth_client,
+    remember_user_id,
     verify_jwt_token,
     verify_state,
 )
@@ -20,25 +32,110 @@ from .models import *  # Phase 2A: Database models
 from . import crud  # Phase 2C: Database operations
 
 # Phase 2B: Create database engine
-engine = create_engine("sqlite:///app.db", echo=True)
+# SQL echo only when debugging (formatting every statement costs CPU on each
+# request), pooled connections may be used from FastAPI's worker threads, and
+# the pool is big enough that threadpool handlers don't queue for a connection
+DB_POOL_SIZE = 20
+DB_MAX_OVERFLOW = 40
+engine = create_engine(
+    "sqlite:///app.db",
+    echo=settings.debug,
+    connect_args={"check_same_thread": False},
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+)
+
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Tune every new SQLite connection.
+    WAL lets readers run while a write is in progress and avoids an fsync
+    of the rollback journal on every commit.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")     # Safe with WAL, far fewer fsyncs
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-64000")      # ~64 MB page cache
+    cursor.execute("PRAGMA mmap_size=268435456")    # 256 MB memory-mapped reads
+    cursor.execute("PRAGMA busy_timeout=5000")      # Wait for the writer instead of failing
+    cursor.close()
+
+# Phase 2B: Database sessions
+# autoflush off: reads don't pay a flush check first (crud commits/flushes
+# explicitly when it writes); expire_on_commit off: objects stay loaded after
+# a commit instead of being re-SELECTed when the response is built
+def new_session() -> Session:
+    return Session(engine, autoflush=False, expire_on_commit=False)
 
 # Create the FastAPI application
-app = FastAPI(title="Secret Sharing API")
+# Responses are serialized with orjson instead of the stdlib json module
+app = FastAPI(title="Secret Sharing API", default_response_class=ORJSONResponse)
+
+def _create_schema():
+    SQLModel.metadata.create_all(engine)
+    # Older databases can hold duplicate memberships from the racy
+    # check-then-insert in add_team_member; keep the oldest of each so the
+    # unique (user_id, team_id) index below can be built
+    with engine.begin() as connection:
+        keep = select(func.min(TeamMembership.id)).group_by(
+            TeamMembership.user_id, TeamMembership.team_id
+        )
+        connection.execute(delete(TeamMembership).where(TeamMembership.id.not_in(keep)))
+    # create_all skips tables that already exist, so add any new indexes
+    # to databases created before they were declared
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
 
 # Phase 2B: Create tables on startup
 @app.on_event("startup")
 def on_startup():
-    SQLModel.metadata.create_all(engine)
+    # With several workers starting at once, another worker can create a
+    # table between our existence check and CREATE; just check again
+    for attempt in range(5):
+        try:
+            _create_schema()
+            break
+        except OperationalError:
+            if attempt == 4:
+                raise
+            time.sleep(0.1)
+    # Refresh SQLite's table statistics so the planner actually picks the
+    # composite indexes above
+    with engine.begin() as connection:
+        connection.exec_driver_sql("PRAGMA analysis_limit=1000")
+        connection.exec_driver_sql("ANALYZE")
+    # Create the default organization here rather than during a login
+    with new_session() as session:
+        crud.ensure_default_organization(session)
+
+# Database endpoints are plain `def`, so FastAPI runs them in anyio's worker
+# threads; allow one thread per pooled connection (the default is 40)
+@app.on_event("startup")
+async def size_threadpool():
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = DB_POOL_SIZE + DB_MAX_OVERFLOW
+
+# Close the shared GitHub connection pools on shutdown
+@app.on_event("shutdown")
+async def on_shutdown():
+    await github_api_client.aclose()
+    await github_oauth_client.aclose()
 
 # Phase 2B: Dependency to get database session
 def get_session():
-    with Session(engine) as session:
+    with new_session() as session:
         yield session
 
 # Phase 2D: Pydantic models for API requests/responses
 class ACLEntry(BaseModel):
     """Defines who can access a secret"""
-    subject_type: str  # 'user', 'team', 'org'
+    # Unknown fields are rejected, and entries are immutable once validated,
+    # so crud can read them directly instead of getting dict copies
+    model_config = ConfigDict(extra="forbid", frozen=True)
+    
+    subject_type: SubjectType  # 'user', 'team', 'org' (anything else is a 422)
     subject_id: Optional[int] = None
     can_read: bool = True
     can_write: bool = False
@@ -54,31 +151,59 @@ class SecretUpdate(BaseModel):
     value: Optional[str] = None
     acl_entries: Optional[List[ACLEntry]] = None
 
-# Phase 2D: Dependency to get current user from JWT
-async def get_current_user(
-    authorization: Optional[str] = Header(None),
-    session: Session = Depends(get_session)
-) -> User:
+class RefreshRequest(BaseModel):
+    """Request body for renewing an access token"""
+    refresh_token: str
+
+class BulkDelete(BaseModel):
+    """Request body for deleting many secrets, teams and users at once"""
+    secrets: List[int] = []
+    teams: List[int] = []
+    users: List[int] = []
+
+# Phase 1F: Bearer token parsing
+def _extract_bearer(authorization: Optional[str]) -> str:
     """
-    Extract and validate user from JWT token.
-    This runs before every protected endpoint.
+    Return the token from an "Authorization: Bearer <token>" header.
+    Raises 401 if the header is missing or uses another scheme.
     """
-    # 1. Check authorization header exists
     if not authorization:
         raise HTTPException(status_code=401, detail="No authorization header")
-    
-    # 2. Check it's a Bearer token
     if not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Invalid authorization format")
+    # Slice off the prefix (unlike str.replace, leaves the token itself alone)
+    return authorization[7:]
+
+async def get_bearer_token(authorization: Optional[str] = Header(None)) -> str:
+    """Dependency form of _extract_bearer for protected endpoints."""
+    return _extract_bearer(authorization)
+
+# Phase 2D: Dependency to get current user from JWT
+def get_current_user(
+    token: str = Depends(get_bearer_token),
+    session: Session = Depends(get_session)
+) -> User:
+    """
+    Extract and validate user from JWT token.
+    This runs before every protected endpoint (in the threadpool, since it
+    may query the database).
+    """
+    # 1. Token seen recently: load its user (usually from cache) and we're
+    #    done - unless that ID now belongs to someone else
+    cached = cached_user_id(token)
+    if cached is not None:
+        user_id, sub = cached
+        user = crud.load_user(session, user_id, sub)
+        if user:
+            return user
     
-    # 3. Extract and verify the token
-    token = authorization.replace("Bearer ", "")
+    # 2. Verify the bearer token (missing/malformed headers were rejected already)
     payload = verify_jwt_token(token)
     
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
-    # 4. Get or create user in database
+    # 3. Get or create user in database
     user = crud.get_or_create_user(
         session,
         email=payload.get("email"),
@@ -86,8 +211,21 @@ async def get_current_user(
         github_id=payload.get("sub")
     )
     
+    # 4. Remember the user for the rest of the token's lifetime
+    remember_user_id(token, payload, user.id)
+    
     return user
 
+# Phase 4A: Dependency for admin-only endpoints
+async def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    """
+    The current user, if they are an admin (403 otherwise).
+    async because it does no I/O, so it runs without a threadpool hop.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
 
 # Part 1A: Basic health check to verify server is running
 @app.get("/health")
@@ -99,8 +237,12 @@ async def health():
     return {"status": "healthy", "service": "secret-sharing-api"}
 
 
+# Development-only endpoints live on their own router, which is only
+# registered when ENV=development (see below)
+dev_router = APIRouter()
+
 # Phase 1C: Test that environment variables are loading correctly
-@app.get("/config-test")
+@dev_router.get("/config-test")
 async def config_test():
     """
     Test endpoint to verify configuration is loaded.
@@ -111,14 +253,14 @@ async def config_test():
         "base_url": settings.base_url,
         "github_client_id": settings.github_client_id[:10] + "...",
         "jwt_algorithm": settings.jwt_algorithm,
-        "admin_emails_count": len(settings.get_admin_emails_list()),
+        "admin_emails_count": len(settings.admin_emails),
     }
 
 
 # JWT Test Endpoints (for development only)
 # Phase 1D: Create a JWT token (simulating what happens after login)
-@app.post("/test-token")
-async def create_test_token(session: Session = Depends(get_session)):
+@dev_router.post("/test-token")
+def create_test_token(session: Session = Depends(get_session)):
     """
     Create a test JWT token with actual database user.
     Phase 3: Updated to create admin user for testing teams.
@@ -136,7 +278,6 @@ async def create_test_token(session: Session = Depends(get_session)):
         test_user.is_admin = True
         session.add(test_user)
         session.commit()
-        session.refresh(test_user)
         
         # 3. Create JWT token with actual user ID
         token_data = {
@@ -145,37 +286,28 @@ async def create_test_token(session: Session = Depends(get_session)):
             "name": test_user.name,
         }
 
-        # 4. Create token
+        # 4. Create token (plus a refresh token to renew it)
         token = create_jwt_token(token_data)
+        refresh_token = crud.issue_refresh_token(session, test_user)
     except Exception as e:
         print(f"Error creating test token: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
     return {
         "token": token,
+        "refresh_token": refresh_token,
         "type": "Bearer",
-        "expires_in_days": settings.jwt_expiry_days,
+        "expires_in_minutes": settings.access_token_ttl_minutes,
     }
 
 
 # Phase 1D: Test endpoint that requires a valid JWT token
-@app.get("/test-protected")
-async def protected_route(authorization: Optional[str] = Header(None)):
+@dev_router.get("/test-protected")
+async def protected_route(token: str = Depends(get_bearer_token)):
     """
     Test endpoint that requires a valid JWT token.
     Send token in Authorization header as: Bearer <token>
     """
-    # Check if authorization header exists
-    if not authorization:
-        raise HTTPException(status_code=401, detail="No authorization header")
-
-    # Check if it's a Bearer token
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization format")
-
-    # Extract the token
-    token = authorization.replace("Bearer ", "")
-
     # Verify the token
     payload = verify_jwt_token(token)
 
@@ -185,9 +317,22 @@ async def protected_route(authorization: Optional[str] = Header(None)):
     # Token is valid! Return the user data
     return {"message": "Token is valid!", "user": payload}
 
+# Production servers don't expose (or route-match against) the test endpoints
+if settings.env == "development":
+    app.include_router(dev_router)
+
 
 # GitHub OAuth Flow Endpoints
 
+# Everything in the GitHub login URL except the state is fixed for the
+# life of the process, so build (and URL-encode) it once
+GITHUB_AUTHORIZE_PREFIX = "https://github.com/login/oauth/authorize?" + urlencode({
+    "client_id": settings.github_client_id,
+    "redirect_uri": f"{settings.base_url}/auth/github/callback",
+    "scope": "user:email",
+    "prompt": "select_account",
+}) + "&state="
+
 # Part 1E: OAuth Endpoint 1 - Start the flow
 @app.get("/auth/github/start")
 async def github_login_start(cli_token: str = Query(...)):
@@ -198,18 +343,56 @@ async def github_login_start(cli_token: str = Query(...)):
     # 1. Create signed state with CLI token inside
     state = create_state(cli_token)
 
-    # 2. Redirect to GitHub login page
-    github_auth_url = (
-        f"https://github.com/login/oauth/authorize"
-        f"?client_id={settings.github_client_id}"
-        f"&redirect_uri={settings.base_url}/auth/github/callback"
-        f"&scope=user:email"
-        f"&state={state}"
-        f"&prompt=select_account"
-    )
-    return RedirectResponse(url=github_auth_url)
+    # 2. Redirect to GitHub login page (state is URL-safe, so just append it)
+    return RedirectResponse(url=GITHUB_AUTHORIZE_PREFIX + state)
 
 
+# Pages shown in the browser at the end of the OAuth flow
+# (constant, so encoded to bytes once instead of rebuilt per callback)
+_LOGIN_SUCCESS_HTML = b"""
+        <html>
+        <body style="font-family: sans-serif; text-align: center; padding: 40px;">
+            <h1>Login Successful :)</h1>
+            <p>You can return to the CLI now.</p>
+            <script>setTimeout(() => window.close(), 2000);</script>
+        </body>
+        </html>
+    """
+_INVALID_STATE_HTML = b"<h1>Error</h1><p>Invalid state</p>"
+_TOKEN_FAILED_HTML = b"<h1>Error</h1><p>Failed to get token</p>"
+_USER_INFO_FAILED_HTML = b"<h1>Error</h1><p>Failed to get user info</p>"
+
+def _save_github_user(user_data: dict) -> str:
+    """
+    Create or update the database user for a GitHub login.
+    Adds is_admin to user_data and returns a new refresh token.
+    """
+    with new_session() as session:
+        # Ensure email is unique by using GitHub login if email is missing
+        user_email = user_data.get("email")
+        if not user_email:
+            user_email = f"{user_data['login']}@users.noreply.github.com"
+        
+        # Ensure name is never None - use login as fallback
+        user_name = user_data.get("name") or user_data["login"]
+        
+        db_user = crud.get_or_create_user(
+            session=session,
+            github_id=str(user_data["id"]),  # Convert to string
+            email=user_email,
+            name=user_name,
+        )
+        # Include is_admin in user data for CLI
+        user_data["is_admin"] = db_user.is_admin
+        
+        # Long-lived refresh token so the CLI can renew its short JWT
+        return crud.issue_refresh_token(session, db_user)
+
+def _store_pending_login(cli_token: str, data: dict) -> None:
+    """Save a finished login for the CLI to collect."""
+    with new_session() as session:
+        crud.store_pending_login(session, cli_token, data)
+
 # Part 1E: OAuth Endpoint 2 - GitHub sends user back here
 @app.get("/auth/github/callback")
 async def github_callback(code: str = Query(...), state: str = Query(...)):
@@ -220,56 +403,39 @@ async def github_callback(code: str = Query(...), state: str = Query(...)):
     # 1. Verify state to prevent CSRF attacks
     state_data = verify_state(state)
     if not state_data:
-        return HTMLResponse("<h1>Error</h1><p>Invalid state</p>", 400)
+        return HTMLResponse(_INVALID_STATE_HTML, 400)
 
     cli_token = state_data["cli_token"]
 
     # 2. Exchange GitHub's code for an access token
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            "https://github.com/login/oauth/access_token",
-            json={
-                "client_id": settings.github_client_id,
-                "client_secret": settings.github_client_secret,
-                "code": code,
-            },
-            headers={"Accept": "application/json"},
-        )
+    resp = await github_oauth_client.post(
+        "/login/oauth/access_token",
+        json={
+            "client_id": settings.github_client_id,
+            "client_secret": settings.github_client_secret,
+            "code": code,
+        },
+    )
 
-        if resp.status_code != 200:
-            return HTMLResponse("<h1>Error</h1><p>Failed to get token</p>", 400)
+    if resp.status_code != 200:
+        return HTMLResponse(_TOKEN_FAILED_HTML, 400)
 
-        token_data = resp.json()
-        access_token = token_data.get("access_token")
+    token_data = orjson.loads(resp.content)
+    access_token = token_data.get("access_token")
 
     # Get user info from GitHub
     user_data = await get_github_user(access_token)
     if not user_data:
-        return HTMLResponse("<h1>Error</h1><p>Failed to get user info</p>", 400)
+        return HTMLResponse(_USER_INFO_FAILED_HTML, 400)
 
     # Create or get user from database to get is_admin status
+    # (blocking SQLite work runs in the threadpool, not on the event loop)
     try:
-        with Session(engine) as session:
-            # Ensure email is unique by using GitHub login if email is missing
-            user_email = user_data.get("email")
-            if not user_email:
-                user_email = f"{user_data['login']}@users.noreply.github.com"
-            
-            # Ensure name is never None - use login as fallback
-            user_name = user_data.get("name") or user_data["login"]
-            
-            db_user = crud.get_or_create_user(
-                session=session,
-                github_id=str(user_data["id"]),  # Convert to string
-                email=user_email,
-                name=user_name,
-            )
-            # Include is_admin in user data for CLI
-            user_data["is_admin"] = db_user.is_admin
+        refresh_token = await run_in_threadpool(_save_github_user, user_data)
     except Exception as e:
         print(f"Error creating/getting user: {e}")
         print(f"GitHub user data: {user_data}")
-        return HTMLResponse(f"<h1>Error</h1><p>Failed to create user: {str(e)}</p>", 500)
+        return HTMLResponse(f"<h1>Error</h1><p>Failed to create user: {html.escape(str(e))}</p>", 500)
     
     # Create JWT for our app
     jwt_token = create_jwt_token(
@@ -283,115 +449,274 @@ async def github_callback(code: str = Query(...), state: str = Query(...)):
         }
     )
     
-    # Store for CLI polling
-    pending_tokens[cli_token] = {"token": jwt_token, "user": user_data}
+    # Store for CLI polling (in the database, so any worker can hand it out)
+    await run_in_threadpool(_store_pending_login, cli_token, {
+        "token": jwt_token,
+        "refresh_token": refresh_token,
+        "user": user_data,
+    })
 
     # Return success page
-    return HTMLResponse(
-        f"""
-        <html>
-        <body style="font-family: sans-serif; text-align: center; padding: 40px;">
-            <h1>Login Successful :)</h1>
-            <p>You can return to the CLI now.</p>
-            <script>setTimeout(() => window.close(), 2000);</script>
-        </body>
-        </html>
-    """
-    )
+    return HTMLResponse(_LOGIN_SUCCESS_HTML)
 
 
 # Part 1E: OAuth Endpoint 3 - CLI gets the token
 @app.get("/auth/cli-exchange")
-async def cli_exchange(cli_token: str = Query(...)):
+def cli_exchange(
+    cli_token: str = Query(...),
+    session: Session = Depends(get_session)
+):
     """
     Part 1E: CLI polls this to get the JWT token
     Returns 404 until login is complete
     """
-    # 1. Check if login is done
-    if cli_token not in pending_tokens:
+    # 1. Take the token out in one step (one-time use)
+    data = crud.take_pending_login(session, cli_token)
+
+    # 2. Check if login is done
+    if data is None:
         raise HTTPException(status_code=404, detail="Token not ready")
 
-    # 2. Return token and remove it (one-time use)
-    data = pending_tokens.pop(cli_token)
-    return {"token": data["token"], "user": data["user"]}
+    return {
+        "token": data["token"],
+        "refresh_token": data.get("refresh_token"),
+        "user": data["user"],
+    }
+
+
+# Part 1E: CLI renews its short-lived JWT
+@app.post("/auth/refresh")
+def refresh_access_token(
+    body: RefreshRequest,
+    session: Session = Depends(get_session)
+):
+    """
+    Trade a refresh token for a new JWT and a new refresh token.
+    Each refresh token works once; returns 401 if unknown or expired.
+    """
+    # 1. Validate and rotate the refresh token
+    result = crud.rotate_refresh_token(session, body.refresh_token)
+    if not result:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    user, refresh_token = result
+
+    # 2. Issue a new short-lived JWT for the same user
+    token = create_jwt_token({
+        "sub": user.github_id,
+        "email": user.email,
+        "name": user.name,
+    })
+
+    return {
+        "token": token,
+        "refresh_token": refresh_token,
+        "type": "Bearer",
+        "expires_in_minutes": settings.access_token_ttl_minutes,
+    }
 
 
 # Phase 2D: Secret Management Endpoints
+# These are plain `def`: FastAPI runs them in its threadpool, so SQLite reads,
+# commits and fsyncs don't block the event loop (and other requests) meanwhile
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match already names this ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in (
+        tag.strip() for tag in if_none_match.split(",")
+    )
+
+def _json_with_etag(request: Request, body: bytes) -> Response:
+    """
+    Send a JSON body tagged with a hash of itself, or a 304 if the client
+    already has exactly this body.
+    """
+    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+# Serialized /teams, /teams/mine, /users and /me responses, keyed by
+# (endpoint, org_id, user_id or None). The CLI re-fetches these on nearly
+# every screen, and they only change through the team/admin endpoints below,
+# which drop their org's entries; the TTL covers other workers and new logins
+LISTING_CACHE_TTL = 30
+_listing_cache: TTLCache = TTLCache(maxsize=5000, ttl=LISTING_CACHE_TTL)
+_listing_cache_lock = threading.Lock()
+# Bumped for an org on every change, so a body built from data read before
+# the change isn't put back into the cache after it was cleared
+_listing_generations: Dict[int, int] = {}
+
+def _cached_json(request: Request, key: tuple, build) -> Response:
+    """Serve a cached response body, calling build() for the payload on a miss."""
+    org_id = key[1]
+    with _listing_cache_lock:
+        body = _listing_cache.get(key)
+        generation = _listing_generations.get(org_id, 0)
+    if body is None:
+        body = orjson.dumps(build())
+        with _listing_cache_lock:
+            if _listing_generations.get(org_id, 0) == generation:
+                _listing_cache[key] = body
+    return _json_with_etag(request, body)
+
+def _forget_org_listings(org_id: int) -> None:
+    """Drop every cached listing for an organization (after a change)."""
+    with _listing_cache_lock:
+        _listing_generations[org_id] = _listing_generations.get(org_id, 0) + 1
+        for key in [k for k in _listing_cache.keys() if k[1] == org_id]:
+            _listing_cache.pop(key, None)
+
+# New users appear in /users, and logins create them outside the endpoints below
+crud.on_user_created(_forget_org_listings)
+
+def _secret_listing(
+    row: dict,
+    acl_entries: list,
+    users_by_id: dict,
+    teams_by_id: dict,
+    current_user: User
+) -> dict:
+    """
+    One entry of the secrets list, with who it is shared with.
+    Phase 3 enhancement: Now includes WHO each secret is shared with.
+    """
+    # 1. Build human-readable sharing summary
+    shared_with = {
+        "users": [],
+        "teams": [],
+        "org_wide": False
+    }
+    
+    # 2. Convert ACL entries ([subject_type, subject_id, can_write], from
+    #    the row's JSON) to names (not just IDs)
+    for subject_type, subject_id, can_write in acl_entries:
+        if subject_type == "user" and subject_id != row["created_by"]:
+            # Add shared user details
+            user = users_by_id.get(subject_id)
+            if user:
+                shared_with["users"].append({
+                    "id": user.id,
+                    "name": user.name,
+                    "email": user.email,
+                    "can_write": bool(can_write)
+                })
+        elif subject_type == "team":
+            # Add shared team details
+            team = teams_by_id.get(subject_id)
+            if team:
+                shared_with["teams"].append({
+                    "id": team.id,
+                    "name": team.name,
+                    "can_write": bool(can_write)
+                })
+        elif subject_type == "org":
+            # Mark organization-wide sharing
+            shared_with["org_wide"] = True
+            shared_with["org_can_write"] = bool(can_write)
+    
+    # 3. Complete the row crud already selected (id, key, value unless left
+    #    out, created_at, created_by, created_by_name, can_write)
+    row["created_by_name"] = row["created_by_name"] or "Unknown"  # New in Phase 3
+    row["is_creator"] = row["created_by"] == current_user.id  # New in Phase 3
+    row["shared_with"] = shared_with  # New in Phase 3: Full sharing details
+    return row
+
+def _secret_listings(session: Session, rows: List[dict], current_user: User) -> List[dict]:
+    """
+    Build list entries for a batch of rows.
+    The rows already carry their ACLs, so this is a fixed two queries
+    (shared users, then shared teams) however many secrets and shares there are.
+    """
+    # 1. Unpack each row's ACL JSON
+    acls = [orjson.loads(row.pop("acl")) for row in rows]
+    
+    # 2. Everyone and every team they mention, looked up once each
+    user_ids, team_ids = set(), set()
+    for entries in acls:
+        for subject_type, subject_id, _ in entries:
+            if subject_type == "user":
+                user_ids.add(subject_id)
+            elif subject_type == "team":
+                team_ids.add(subject_id)
+    users_by_id = crud.users_by_id(session, user_ids)
+    teams_by_id = crud.teams_by_id(session, team_ids)
+    
+    # 3. Assemble the entries
+    return [
+        _secret_listing(row, entries, users_by_id, teams_by_id, current_user)
+        for row, entries in zip(rows, acls)
+    ]
+
+def _stream_secrets(user_id: int, query: Optional[str], values: bool = True):
+    """
+    Yield the secrets list as NDJSON, one secret per line, batch by batch.
+    Uses its own session because the response outlives the request's one.
+    """
+    with new_session() as session:
+        user = session.get(User, user_id)
+        for rows in crud.iter_secret_rows(session, user, query, values):
+            for entry in _secret_listings(session, rows, user):
+                yield orjson.dumps(entry) + b"\n"
+
+def _stream_secrets_array(user_id: int, query: Optional[str], values: bool = True):
+    """
+    Yield the secrets list as one JSON array, written element by element,
+    for clients that want the same JSON as the unstreamed list.
+    """
+    separator = b"["
+    for line in _stream_secrets(user_id, query, values):
+        yield separator + line[:-1]  # drop the NDJSON newline
+        separator = b","
+    yield b"]" if separator == b"," else b"[]"
 
 @app.get("/secrets")
-async def list_secrets(
+def list_secrets(
+    request: Request,
     query: Optional[str] = Query(None, description="Search filter for secret keys"),
+    stream: bool = Query(False, description="Stream the list as NDJSON (one secret per line)"),
+    values: bool = Query(True, description="Include secret values (false lists keys and sharing only)"),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
     List all secrets user can access with detailed sharing information.
-    Phase 3 enhancement: Now includes WHO each secret is shared with.
+    With stream=true, large lists are sent row by row instead of all at once
+    (NDJSON, or a JSON array with Accept: application/json).
+    With values=false the values are never read from the database.
     """
-    # 1. Get all secrets user can read (filtered by permissions)
-    secrets = crud.list_secrets(session, current_user, query)
+    # Streaming: rows are fetched, completed and sent in batches - as NDJSON,
+    # or as a JSON array if the client asks for application/json
+    if stream:
+        if "application/json" in request.headers.get("accept", ""):
+            return StreamingResponse(
+                _stream_secrets_array(current_user.id, query, values),
+                media_type="application/json"
+            )
+        return StreamingResponse(
+            _stream_secrets(current_user.id, query, values),
+            media_type="application/x-ndjson"
+        )
     
-    # 2. Build enhanced response with sharing details (Phase 3 improvement)
-    result = []
-    for secret in secrets:
-        # 2a. Get all ACL entries to see who has access
-        stmt = select(ACL).where(ACL.secret_id == secret.id)
-        acl_entries = session.exec(stmt).all()
-        
-        # 2b. Build human-readable sharing summary
-        shared_with = {
-            "users": [],
-            "teams": [],
-            "org_wide": False
-        }
-        
-        # 2c. Convert ACL entries to names (not just IDs)
-        for acl in acl_entries:
-            if acl.subject_type == "user" and acl.subject_id != secret.created_by_id:
-                # Add shared user details
-                user = session.get(User, acl.subject_id)
-                if user:
-                    shared_with["users"].append({
-                        "id": user.id,
-                        "name": user.name,
-                        "email": user.email,
-                        "can_write": acl.can_write
-                    })
-            elif acl.subject_type == "team":
-                # Add shared team details
-                team = session.get(Team, acl.subject_id)
-                if team:
-                    shared_with["teams"].append({
-                        "id": team.id,
-                        "name": team.name,
-                        "can_write": acl.can_write
-                    })
-            elif acl.subject_type == "org":
-                # Mark organization-wide sharing
-                shared_with["org_wide"] = True
-                shared_with["org_can_write"] = acl.can_write
-        
-        # 2d. Get creator's name
-        creator = session.get(User, secret.created_by_id)
-        creator_name = creator.name if creator else "Unknown"
-        
-        # 2e. Compile all secret info
-        result.append({
-            "id": secret.id,
-            "key": secret.key,
-            "value": secret.value,
-            "created_at": secret.created_at.isoformat(),
-            "created_by": secret.created_by_id,
-            "created_by_name": creator_name,  # New in Phase 3
-            "can_write": crud.can_write_secret(session, current_user, secret),
-            "is_creator": secret.created_by_id == current_user.id,  # New in Phase 3
-            "shared_with": shared_with  # New in Phase 3: Full sharing details
-        })
-    
-    return result
+    # 1. Get all secrets user can read (filtered by permissions), as plain
+    #    rows with creator name and can_write already worked out by SQL
+    rows = crud.list_secret_rows(session, current_user, query, values)
+    
+    # 2. Add sharing details (Phase 3 improvement)
+    result = _secret_listings(session, rows, current_user)
+    
+    # 3. The list is already plain dicts, so hand it straight to orjson
+    #    (datetimes included) instead of re-encoding it with jsonable_encoder
+    body = orjson.dumps(result)
+    
+    # 4. Tag the exact body, so a poll that finds nothing changed (no edits,
+    #    shares or deletes) gets a 304 instead of the whole list again
+    return _json_with_etag(request, body)
 
 @app.post("/secrets", status_code=201)
-async def create_secret(
+def create_secret(
     body: SecretCreate,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
@@ -400,21 +725,16 @@ async def create_secret(
     Create a new secret.
     User provides key and value, optionally can share with teams/users.
     """
-    # 1. Convert ACL entries to dict format for crud function
-    acl_dicts = None
-    if body.acl_entries:
-        acl_dicts = [entry.dict() for entry in body.acl_entries]
-    
-    # 2. Create the secret in database
+    # 1. Create the secret in database (ACL entries are passed as-is)
     secret = crud.create_secret(
         session,
         current_user,
         body.key,
         body.value,
-        acl_dicts
+        body.acl_entries
     )
     
-    # 3. Return created secret with metadata
+    # 2. Return created secret with metadata
     return {
         "id": secret.id,
         "key": secret.key,
@@ -426,7 +746,8 @@ async def create_secret(
 
 # Phase 4C: Enhanced user info endpoint - Get current user with teams and org
 @app.get("/me")
-async def get_current_user_info(
+def get_current_user_info(
+    request: Request,
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
@@ -434,32 +755,37 @@ async def get_current_user_info(
     Get current user information with organization and teams.
     Shows complete user profile including admin status and team memberships.
     """
-    # 1. Get user's teams
-    teams = crud.get_user_teams(session, current_user.id)
-    
-    # 2. Get user's organization
-    org = session.get(Organization, current_user.organization_id)
+    def build():
+        # 1. Get user's teams
+        teams = crud.get_user_teams(session, current_user.id)
+        
+        # 2. Get user's organization
+        org = session.get(Organization, current_user.organization_id)
+        
+        # 3. Return comprehensive user info
+        return {
+            "user": {
+                "id": current_user.id,
+                "email": current_user.email,
+                "name": current_user.name,
+                "is_admin": current_user.is_admin
+            },
+            "organization": {
+                "id": org.id,
+                "name": org.name
+            } if org else None,
+            "teams": [
+                {"id": t.id, "name": t.name} for t in teams
+            ]
+        }
     
-    # 3. Return comprehensive user info
-    return {
-        "user": {
-            "id": current_user.id,
-            "email": current_user.email,
-            "name": current_user.name,
-            "is_admin": current_user.is_admin
-        },
-        "organization": {
-            "id": org.id,
-            "name": org.name
-        } if org else None,
-        "teams": [
-            {"id": t.id, "name": t.name} for t in teams
-        ]
-    }
+    key = ("me", current_user.organization_id, current_user.id)
+    return _cached_json(request, key, build)
 
 @app.get("/secrets/{secret_id}")
-async def get_secret(
+def get_secret(
     secret_id: int,
+    request: Request,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -467,30 +793,34 @@ async def get_secret(
     Get a specific secret by ID.
     Returns 404 if not found, 403 if no permission.
     """
-    # 1. Try to get the secret
-    secret = crud.get_secret(session, secret_id, current_user)
+    # 1. Try to get the secret (and whether the user may edit it)
+    secret, access, can_write = crud.get_secret(session, secret_id, current_user)
     
     # 2. Handle not found or no permission
-    if not secret:
-        # Check if secret exists but user can't access it
-        secret_exists = session.get(Secret, secret_id)
-        if secret_exists and secret_exists.organization_id == current_user.organization_id:
-            raise HTTPException(status_code=403, detail="Access denied")
-        else:
-            raise HTTPException(status_code=404, detail="Secret not found")
-    
-    # 3. Return secret with metadata
-    return {
+    if access == crud.SecretAccess.FORBIDDEN:
+        raise HTTPException(status_code=403, detail="Access denied")
+    if access == crud.SecretAccess.NOT_FOUND:
+        raise HTTPException(status_code=404, detail="Secret not found")
+    
+    # 3. Client already has this version: 304 without a body
+    #    (value changes bump updated_at; can_write is per user, so it's included)
+    updated_us = int(secret.updated_at.timestamp() * 1_000_000)
+    etag = f'W/"{secret.id}-{updated_us}-{int(can_write)}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    # 4. Return secret with metadata
+    return ORJSONResponse({
         "id": secret.id,
         "key": secret.key,
         "value": secret.value,
         "created_by_id": secret.created_by_id,
         "created_at": secret.created_at,
-        "can_write": crud.can_write_secret(session, current_user, secret)
-    }
+        "can_write": can_write
+    }, headers={"ETag": etag})
 
 @app.put("/secrets/{secret_id}")
-async def update_secret(
+def update_secret(
     secret_id: int,
     body: SecretUpdate,
     session: Session = Depends(get_session),
@@ -500,32 +830,22 @@ async def update_secret(
     Update a secret's value or permissions.
     Only users with write permission can update.
     """
-    # 1. Convert ACL entries if provided
-    acl_dicts = None
-    if body.acl_entries is not None:
-        acl_dicts = [entry.dict() for entry in body.acl_entries]
-    
-    # 2. Try to update the secret
-    secret = crud.update_secret(
+    # 1. Try to update the secret (ACL entries, if any, are passed as-is)
+    secret, access = crud.update_secret(
         session,
         secret_id,
         current_user,
         body.value,
-        acl_dicts
+        body.acl_entries
     )
     
-    # 3. Handle errors
-    if not secret:
-        # Check why update failed
-        secret_exists = session.get(Secret, secret_id)
-        if not secret_exists:
-            raise HTTPException(status_code=404, detail="Secret not found")
-        elif not crud.can_write_secret(session, current_user, secret_exists):
-            raise HTTPException(status_code=403, detail="No write permission")
-        else:
-            raise HTTPException(status_code=400, detail="Update failed")
-    
-    # 4. Return updated secret
+    # 2. Handle errors
+    if access == crud.SecretAccess.NOT_FOUND:
+        raise HTTPException(status_code=404, detail="Secret not found")
+    if access == crud.SecretAccess.FORBIDDEN:
+        raise HTTPException(status_code=403, detail="No write permission")
+    
+    # 3. Return updated secret
     return {
         "id": secret.id,
         "key": secret.key,
@@ -538,7 +858,8 @@ async def update_secret(
 # Phase 3B: Team Management Endpoints
 
 @app.get("/teams")
-async def list_teams(
+def list_teams(
+    request: Request,
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
@@ -546,14 +867,20 @@ async def list_teams(
     List all teams in the organization.
     Any user can see all teams in their org.
     """
-    # 1. Get all teams in user's organization
-    teams = crud.get_org_teams(session, current_user.organization_id)
+    org_id = current_user.organization_id
+    
+    def build():
+        # 1. Get all teams in user's organization
+        teams = crud.get_org_teams(session, org_id)
+        
+        # 2. Return teams list
+        return {"teams": [team.model_dump() for team in teams]}
     
-    # 2. Return teams list
-    return {"teams": teams}
+    return _cached_json(request, ("teams", org_id, None), build)
 
 @app.get("/teams/mine")
-async def my_teams(
+def my_teams(
+    request: Request,
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
@@ -561,80 +888,78 @@ async def my_teams(
     List teams the current user belongs to.
     Shows which teams the user is a member of.
     """
-    # 1. Get teams user is a member of
-    teams = crud.get_user_teams(session, current_user.id)
+    def build():
+        # 1. Get teams user is a member of
+        teams = crud.get_user_teams(session, current_user.id)
+        
+        # 2. Return user's teams
+        return {"teams": [team.model_dump() for team in teams]}
     
-    # 2. Return user's teams
-    return {"teams": teams}
+    # Membership changes drop the org's entries, so this stays current
+    key = ("mine", current_user.organization_id, current_user.id)
+    return _cached_json(request, key, build)
 
 @app.post("/teams")
-async def create_team_endpoint(
+def create_team_endpoint(
     name: str = Query(..., description="Team name"),
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_admin),
     session: Session = Depends(get_session)
 ):
     """
     Create a new team (admin only).
     Admin users can create teams in their organization.
     """
-    # 1. Check if user is admin
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
-    # 2. Validate team name is not empty
+    # 1. Validate team name is not empty
     if not name or not name.strip():
         raise HTTPException(status_code=422, detail="Team name cannot be empty")
     
-    # 3. Create the team with cleaned name
+    # 2. Create the team with cleaned name
     team = crud.create_team(session, name.strip(), current_user.organization_id)
     
-    # 4. Add creator as first member
+    # 3. Add creator as first member
     crud.add_team_member(session, team.id, current_user.id)
+    _forget_org_listings(current_user.organization_id)
     
-    # 5. Return created team as dict
+    # 4. Return created team as dict
     return {
         "team": {
             "id": team.id,
             "name": team.name,
             "organization_id": team.organization_id,
-            "created_at": team.created_at.isoformat() if team.created_at else None
+            "created_at": team.created_at
         }
     }
 
 @app.post("/teams/{team_id}/members")
-async def add_member(
+def add_member(
     team_id: int,
     user_id: int = Query(..., description="User ID to add"),
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_admin),
     session: Session = Depends(get_session)
 ):
     """
     Add a member to a team (admin only).
     Admins can add any user in their org to any team.
     """
-    # 1. Check if user is admin
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
-    # 2. Verify team exists and belongs to user's org
-    teams = crud.get_org_teams(session, current_user.organization_id)
-    team = next((t for t in teams if t.id == team_id), None)
+    # 1. Verify team exists and belongs to user's org
+    team = crud.get_team_in_org(session, team_id, current_user.organization_id)
     if not team:
         raise HTTPException(status_code=404, detail="Team not found in your organization")
     
-    # 3. Verify user exists and belongs to same org
-    user_to_add = session.get(User, user_id)
-    if not user_to_add or user_to_add.organization_id != current_user.organization_id:
+    # 2. Verify user exists and belongs to same org
+    user_to_add = crud.get_user_in_org(session, user_id, current_user.organization_id)
+    if not user_to_add:
         raise HTTPException(status_code=404, detail="User not found in your organization")
     
-    # 4. Add user to team
+    # 3. Add user to team
     membership = crud.add_team_member(session, team_id, user_id)
+    _forget_org_listings(current_user.organization_id)
     
-    # 5. Return membership info
+    # 4. Return membership info
     return {"membership": membership, "message": f"User {user_to_add.name} added to team {team.name}"}
 
 @app.get("/teams/{team_id}/members")
-async def list_team_members(
+def list_team_members(
     team_id: int,
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session)
@@ -644,19 +969,20 @@ async def list_team_members(
     Any user in the org can see team membership.
     """
     # 1. Verify team exists and belongs to user's org
-    teams = crud.get_org_teams(session, current_user.organization_id)
-    team = next((t for t in teams if t.id == team_id), None)
+    team = crud.get_team_in_org(session, team_id, current_user.organization_id)
     if not team:
         raise HTTPException(status_code=404, detail="Team not found in your organization")
     
     # 2. Get team members
     members = crud.get_team_members(session, team_id)
     
-    # 3. Return members list
-    return {"team": team, "members": members}
+    # 3. Return members list, through orjson like every other listing so
+    #    created_at is formatted the same
+    return ORJSONResponse({"team": team.model_dump(), "members": members})
 
 @app.get("/users")
-async def list_users(
+def list_users(
+    request: Request,
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
@@ -664,53 +990,55 @@ async def list_users(
     List all users in the organization.
     Used for adding users to teams.
     """
-    # 1. Get all users in the organization
-    stmt = select(User).where(User.organization_id == current_user.organization_id)
-    users = session.exec(stmt).all()
+    org_id = current_user.organization_id
+    
+    def build():
+        # 1. Get all users in the organization (only the fields the CLI shows)
+        users = crud.get_org_users(session, org_id)
+        
+        # 2. Return users list
+        return {"users": users}
     
-    # 2. Return users list
-    return {"users": users}
+    return _cached_json(request, ("users", org_id, None), build)
 
 
 # PHASE 4A: Admin User Management Endpoints
 
 @app.post("/admin/users")
-async def create_user(
+def create_user(
     email: str = Query(..., description="User email"),
     name: str = Query(..., description="User full name"),
     is_admin: bool = Query(False, description="Grant admin privileges"),
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_admin),
     session: Session = Depends(get_session)
 ):
     """
     Create a new user (admin only).
     This allows admins to onboard users without GitHub login.
     """
-    # 1. Check if current user is admin
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
-    # 2. Check if email already exists
+    # 1. Check if email already exists
     existing = session.exec(select(User).where(User.email == email)).first()
     if existing:
         raise HTTPException(status_code=400, detail="User with this email already exists")
     
-    # 3. Create new user with manual prefix (no GitHub ID yet)
+    # 2. Create new user with manual prefix (no GitHub ID yet)
+    #    (one clock read for both the join date and the ID suffix)
+    now = utc_now()
     new_user = User(
         email=email,
         name=name,
-        github_id=f"manual-{email}-{int(time.time())}",  # Unique ID for manual users
+        github_id=f"manual-{email}-{int(now.timestamp())}",  # Unique ID for manual users
         organization_id=current_user.organization_id,
         is_admin=is_admin,
-        created_at=datetime.utcnow()
+        created_at=now
     )
     
-    # 4. Save to database
+    # 3. Save to database
     session.add(new_user)
     session.commit()
-    session.refresh(new_user)
+    _forget_org_listings(current_user.organization_id)
     
-    # 5. Return created user
+    # 4. Return created user
     return {
         "user": {
             "id": new_user.id,
@@ -722,140 +1050,124 @@ async def create_user(
     }
 
 @app.put("/admin/users/{user_id}/promote")
-async def promote_to_admin(
+def promote_to_admin(
     user_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_admin),
     session: Session = Depends(get_session)
 ):
     """
     Promote user to admin (admin only).
     Grants admin privileges to a regular user.
     """
-    # 1. Check if current user is admin
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
-    # 2. Find the user to promote
-    user = session.get(User, user_id)
-    if not user or user.organization_id != current_user.organization_id:
+    # 1. Find the user to promote
+    user = crud.get_user_in_org(session, user_id, current_user.organization_id)
+    if not user:
         raise HTTPException(status_code=404, detail="User not found in your organization")
     
-    # 3. Check if already admin
+    # 2. Check if already admin
     if user.is_admin:
         return {"message": f"User {user.name} is already an admin"}
     
-    # 4. Promote to admin
+    # 3. Promote to admin
     user.is_admin = True
     session.commit()
+    crud.forget_user(user)
+    _forget_org_listings(current_user.organization_id)
     
-    # 5. Return success message
+    # 4. Return success message
     return {"message": f"User {user.name} promoted to admin"}
 
 @app.delete("/admin/users/{user_id}")
-async def delete_user(
+def delete_user(
     user_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_admin),
     session: Session = Depends(get_session)
 ):
     """
     Delete a user (admin only).
     Removes user and all their team memberships.
     """
-    # 1. Check if current user is admin
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
-    # 2. Prevent self-deletion
+    # 1. Prevent self-deletion
     if user_id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
-    # 3. Find the user to delete
-    user = session.get(User, user_id)
-    if not user or user.organization_id != current_user.organization_id:
+    # 2. Find the user to delete
+    user = crud.get_user_in_org(session, user_id, current_user.organization_id)
+    if not user:
         raise HTTPException(status_code=404, detail="User not found in your organization")
     
-    # 4. Delete user (cascade will handle memberships and ACLs)
+    # 3. Delete user (cascade will handle memberships and ACLs), and their
+    #    refresh tokens - SQLite may give their ID to the next new user
+    crud.revoke_refresh_tokens(session, [user.id])
     session.delete(user)
     session.commit()
+    crud.forget_user(user)
+    _forget_org_listings(current_user.organization_id)
     
-    # 5. Return success message
+    # 4. Return success message
     return {"message": f"User {user.name} deleted successfully"}
 
 @app.delete("/admin/teams/{team_id}")
-async def delete_team(
+def delete_team(
     team_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_admin),
     session: Session = Depends(get_session)
 ):
     """
     Delete a team (admin only).
     Removes team and all memberships.
     """
-    # 1. Check if current user is admin
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
-    # 2. Find the team to delete
-    team = session.get(Team, team_id)
-    if not team or team.organization_id != current_user.organization_id:
+    # 1. Find the team to delete
+    team = crud.get_team_in_org(session, team_id, current_user.organization_id)
+    if not team:
         raise HTTPException(status_code=404, detail="Team not found in your organization")
     
-    # 3. Delete related records first (memberships and ACL entries)
-    # Delete all team memberships
-    stmt = select(TeamMembership).where(TeamMembership.team_id == team_id)
-    memberships = session.exec(stmt).all()
-    for membership in memberships:
-        session.delete(membership)
-    
-    # Delete all ACL entries for this team
-    stmt = select(ACL).where(ACL.subject_type == "team", ACL.subject_id == team_id)
-    acl_entries = session.exec(stmt).all()
-    for acl in acl_entries:
-        session.delete(acl)
-    
-    # 4. Now delete the team
-    session.delete(team)
+    # 2. Delete related records first (memberships and ACL entries),
+    #    each with a single statement
+    session.exec(delete(TeamMembership).where(TeamMembership.team_id == team_id))
+    session.exec(delete(ACL).where(ACL.subject_type == "team", ACL.subject_id == team_id))
+    
+    # 3. Now delete the team
+    session.exec(delete(Team).where(Team.id == team_id))
     session.commit()
+    _forget_org_listings(current_user.organization_id)
     
-    # 5. Return success message
+    # 4. Return success message
     return {"message": f"Team {team.name} deleted successfully"}
 
 @app.delete("/teams/{team_id}/members/{user_id}")
-async def remove_team_member(
+def remove_team_member(
     team_id: int,
     user_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_admin),
     session: Session = Depends(get_session)
 ):
     """
     Remove user from team (admin only).
     Removes a team membership.
     """
-    # 1. Check if current user is admin
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
-    # 2. Find the membership to remove
+    # 1. Find the membership to remove
     stmt = select(TeamMembership).where(
         TeamMembership.team_id == team_id,
         TeamMembership.user_id == user_id
     )
     membership = session.exec(stmt).first()
     
-    # 3. Check if membership exists
+    # 2. Check if membership exists
     if not membership:
         raise HTTPException(status_code=404, detail="User is not a member of this team")
     
-    # 4. Verify team is in user's org
-    team = session.get(Team, team_id)
-    if not team or team.organization_id != current_user.organization_id:
+    # 3. Verify team is in user's org
+    team = crud.get_team_in_org(session, team_id, current_user.organization_id)
+    if not team:
         raise HTTPException(status_code=404, detail="Team not found in your organization")
     
-    # 5. Remove membership
+    # 4. Remove membership
     session.delete(membership)
     session.commit()
+    _forget_org_listings(current_user.organization_id)
     
-    # 6. Return success message
+    # 5. Return success message
     user = session.get(User, user_id)
     return {"message": f"User {user.name if user else 'unknown'} removed from team {team.name}"}
 
@@ -863,7 +1175,7 @@ async def remove_team_member(
 # PHASE 4B: Secret Management Endpoints (Delete)
 
 @app.delete("/secrets/{secret_id}")
-async def delete_secret(
+def delete_secret(
     secret_id: int,
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session)
@@ -885,15 +1197,81 @@ async def delete_secret(
     if secret.created_by_id != current_user.id and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Only creator or admin can delete this secret")
     
-    # 4. Delete all ACL entries for this secret first
-    stmt = select(ACL).where(ACL.secret_id == secret_id)
-    acl_entries = session.exec(stmt).all()
-    for acl in acl_entries:
-        session.delete(acl)
+    # 4. Delete all ACL entries for this secret first (one statement)
+    session.exec(delete(ACL).where(ACL.secret_id == secret_id))
     
-    # 5. Now delete the secret
-    session.delete(secret)
+    # 5. Now delete the secret (as a statement too, so the ORM doesn't load
+    #    its ACL collection just to find nothing left in it)
+    session.exec(delete(Secret).where(Secret.id == secret_id))
     session.commit()
     
     # 6. Return success message
     return {"message": f"Secret '{secret.key}' deleted successfully"}
+
+@app.post("/admin/bulk-delete")
+def bulk_delete(
+    body: BulkDelete,
+    current_user: User = Depends(require_admin),
+    session: Session = Depends(get_session)
+):
+    """
+    Delete many secrets, teams and users in one request (admin only).
+    Same clean-up as the single deletes, but one statement per table; IDs
+    that are gone or outside the admin's organization are skipped.
+    """
+    org_id = current_user.organization_id
+    deleted = {"secrets": 0, "teams": 0, "users": 0}
+    users = []
+    
+    # 1. Secrets, then their ACL entries
+    if body.secrets:
+        secret_ids = session.execute(
+            delete(Secret)
+            .where(Secret.id.in_(body.secrets), Secret.organization_id == org_id)
+            .returning(Secret.id)
+        ).scalars().all()
+        if secret_ids:
+            session.exec(delete(ACL).where(ACL.secret_id.in_(secret_ids)))
+        deleted["secrets"] = len(secret_ids)
+    
+    # 2. Teams, then their memberships and the secrets shared with them
+    if body.teams:
+        team_ids = session.execute(
+            delete(Team)
+            .where(Team.id.in_(body.teams), Team.organization_id == org_id)
+            .returning(Team.id)
+        ).scalars().all()
+        if team_ids:
+            session.exec(delete(TeamMembership).where(TeamMembership.team_id.in_(team_ids)))
+            session.exec(delete(ACL).where(ACL.subject_type == "team", ACL.subject_id.in_(team_ids)))
+        deleted["teams"] = len(team_ids)
+    
+    # 3. Users (never the admin making the request), then their memberships,
+    #    direct shares and refresh tokens, so a later user given a reused ID
+    #    inherits nothing
+    if body.users:
+        users = session.execute(
+            delete(User)
+            .where(
+                User.id.in_(body.users),
+                User.organization_id == org_id,
+                User.id != current_user.id
+            )
+            .returning(User)
+        ).scalars().all()
+        user_ids = [user.id for user in users]
+        if user_ids:
+            session.exec(delete(TeamMembership).where(TeamMembership.user_id.in_(user_ids)))
+            session.exec(delete(ACL).where(ACL.subject_type == "user", ACL.subject_id.in_(user_ids)))
+            crud.revoke_refresh_tokens(session, user_ids)
+        deleted["users"] = len(user_ids)
+    
+    # 4. One transaction for everything, then drop anything cached about it
+    session.commit()
+    for user in users:
+        crud.forget_user(user)
+    if deleted["teams"] or deleted["users"]:
+        _forget_org_listings(org_id)
+    
+    # 5. Return how many of each were deleted
+    return {"deleted": deleted}
@@ -1,6 +1,35 @@
 from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import Column, DateTime, Enum as SAEnum, Index, TypeDecorator
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, timezone
+from enum import Enum
+
+def utc_now() -> datetime:
+    # Timezone-aware replacement for the deprecated datetime.utcnow()
+    return datetime.now(timezone.utc)
+
+class UTCDateTime(TypeDecorator):
+    # Stored as naive UTC (SQLite has no time zones), always read back as
+    # timezone-aware UTC - so a freshly created object and the same row
+    # loaded later serialize the same way
+    impl = DateTime
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    
+    def process_result_value(self, value, dialect):
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+
+class SubjectType(str, Enum):
+    # Who an ACL rule is for - compares equal to the plain strings
+    USER = "user"
+    TEAM = "team"
+    ORG = "org"
 
 # These are our database tables - each class becomes a table
 # Think of it like a spreadsheet where each class is a different sheet
@@ -9,7 +38,7 @@ class Organization(SQLModel, table=True):
     # Like a company - everyone belongs to one
     id: Optional[int] = Field(default=None, primary_key=True)  # Auto-generated ID
     name: str = Field(unique=True)  # Company name (must be unique)
-    created_at: datetime = Field(default_factory=datetime.utcnow)  # When created
+    created_at: datetime = Field(default_factory=utc_now, sa_type=UTCDateTime)  # When created
     
     # Links to other tables (not real columns)
     users: List["User"] = Relationship(back_populates="organization")
@@ -22,9 +51,9 @@ class User(SQLModel, table=True):
     email: str = Field(unique=True)  # Their email (must be unique)
     name: str  # Display name
     github_id: str = Field(unique=True)  # GitHub user ID (for login)
-    organization_id: Optional[int] = Field(default=None, foreign_key="organization.id")  # Which company they belong to
+    organization_id: Optional[int] = Field(default=None, foreign_key="organization.id", index=True)  # Which company they belong to
     is_admin: bool = Field(default=False)  # Can they manage users/teams?
-    created_at: datetime = Field(default_factory=datetime.utcnow)  # Join date
+    created_at: datetime = Field(default_factory=utc_now, sa_type=UTCDateTime)  # Join date
     
     # Links to other tables
     organization: Optional[Organization] = Relationship(back_populates="users")
@@ -35,8 +64,8 @@ class Team(SQLModel, table=True):
     # A group of users (like "engineering" or "marketing")
     id: Optional[int] = Field(default=None, primary_key=True)  # Auto ID
     name: str  # Team name like "Backend Team"
-    organization_id: int = Field(foreign_key="organization.id")  # Which company owns this team
-    created_at: datetime = Field(default_factory=datetime.utcnow)  # When created
+    organization_id: int = Field(foreign_key="organization.id", index=True)  # Which company owns this team
+    created_at: datetime = Field(default_factory=utc_now, sa_type=UTCDateTime)  # When created
     
     # Links to other tables
     organization: Organization = Relationship(back_populates="teams")
@@ -45,6 +74,13 @@ class Team(SQLModel, table=True):
 class TeamMembership(SQLModel, table=True):
     # Links users to teams (many-to-many relationship)
     # One user can be in many teams, one team has many users
+    __table_args__ = (
+        # Permission checks look up "is user X in team Y" - also blocks duplicate rows
+        Index("ix_tm_user_team", "user_id", "team_id", unique=True),
+        # Member lists and team deletes go by team alone
+        Index("ix_tm_team", "team_id"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)  # Auto ID
     team_id: int = Field(foreign_key="team.id")  # Which team
     user_id: int = Field(foreign_key="user.id")  # Which user
@@ -56,13 +92,19 @@ class TeamMembership(SQLModel, table=True):
 class Secret(SQLModel, table=True):
     # The main thing we're storing - a key-value pair
     # Like "DATABASE_URL" = "postgres://localhost/mydb"
+    __table_args__ = (
+        # Listing/searching always filters by org; key search is checked
+        # against the index entries instead of reading every secret row
+        Index("ix_secret_org_key", "organization_id", "key"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)  # Auto ID
     organization_id: int = Field(foreign_key="organization.id")  # Which company owns this
     key: str  # The name like "API_KEY" or "DATABASE_PASSWORD"
     value: str  # The actual secret value
     created_by_id: int = Field(foreign_key="user.id")  # Who created this
-    created_at: datetime = Field(default_factory=datetime.utcnow)  # When created
-    updated_at: datetime = Field(default_factory=datetime.utcnow)  # Last modified
+    created_at: datetime = Field(default_factory=utc_now, sa_type=UTCDateTime)  # When created
+    updated_at: datetime = Field(default_factory=utc_now, sa_type=UTCDateTime)  # Last modified
     
     # Links to other tables
     organization: Organization = Relationship(back_populates="secrets")
@@ -72,9 +114,28 @@ class Secret(SQLModel, table=True):
 class ACL(SQLModel, table=True):
     # Access Control List - who can see/edit each secret
     # Each row is one permission rule
+    __table_args__ = (
+        # Every permission check filters by secret, then by who the rule is for
+        Index("ix_acl_lookup", "secret_id", "subject_type", "subject_id"),
+        # Listing goes the other way: "which secrets is this subject allowed to
+        # read" - answered from the index alone, without touching ACL rows
+        Index("ix_acl_subject_read", "subject_type", "subject_id", "can_read", "secret_id"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)  # Auto ID
     secret_id: int = Field(foreign_key="secret.id")  # Which secret this rule is for
-    subject_type: str  # Who gets permission: 'user', 'team', or 'org'
+    # Who gets permission: 'user', 'team', or 'org'
+    # Stored as the same short strings as before (no migration needed), but
+    # only those three are accepted and rows come back as SubjectType
+    subject_type: SubjectType = Field(sa_column=Column(
+        SAEnum(
+            SubjectType,
+            native_enum=False,
+            length=4,
+            values_callable=lambda members: [m.value for m in members],
+        ),
+        nullable=False,
+    ))
     subject_id: Optional[int] = None  # ID of the user/team (None for whole org)
     can_read: bool = Field(default=True)  # Can they view it?
     can_write: bool = Field(default=False)  # Can they change it?
@@ -89,4 +150,21 @@ class ACL(SQLModel, table=True):
     # {secret_id: 3, subject_type: "org", subject_id: None, can_read: True}
     # Means: Everyone in the organization can read secret #3
     
-    secret: Secret = Relationship(back_populates="acl_entries")
\ No newline at end of file
+    secret: Secret = Relationship(back_populates="acl_entries")
+
+class RefreshToken(SQLModel, table=True):
+    # Long-lived token the CLI trades for a new short-lived JWT
+    # Only a hash is stored, so a leaked database can't be used to log in
+    id: Optional[int] = Field(default=None, primary_key=True)  # Auto ID
+    user_id: int = Field(foreign_key="user.id", index=True)  # Whose session this is
+    token_hash: str = Field(unique=True)  # SHA-256 of the token we handed out
+    expires_at: datetime = Field(index=True, sa_type=UTCDateTime)  # When the CLI must log in again
+    created_at: datetime = Field(default_factory=utc_now, sa_type=UTCDateTime)  # When issued
+
+class PendingLogin(SQLModel, table=True):
+    # A finished GitHub login waiting for the CLI to collect it
+    # Kept in the database (not process memory) so the worker that handled
+    # the callback and the worker the CLI polls don't have to be the same
+    key: str = Field(primary_key=True)  # Hash of the CLI's one-time token
+    data: bytes  # JSON: JWT, refresh token and GitHub user info
+    expires_at: datetime = Field(index=True, sa_type=UTCDateTime)  # Uncollected logins are dropped after this
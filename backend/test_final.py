@@ -11,6 +11,8 @@ assignment, with clear annotations showing what is being tested and why.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 import json
 import time
 import sys
@@ -19,6 +21,25 @@ from datetime import datetime
 
 # Test configuration
 BASE_URL = "http://localhost:8001"
+
+# Every request gives up after this (connect, read) unless it sets its own,
+# so a hung request fails its section instead of stalling the whole suite
+REQUEST_TIMEOUT = (2, 10)
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies REQUEST_TIMEOUT to requests without a timeout"""
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = REQUEST_TIMEOUT
+        return super().send(request, **kwargs)
+
+# One keep-alive connection pool for every request, instead of a new TCP
+# connection per call (also keeps connect time out of the timing checks)
+SESSION = requests.Session()
+SESSION.mount("http://", TimeoutHTTPAdapter(pool_connections=20, pool_maxsize=50))
+
+# Worker threads for probes that don't depend on each other
+EXECUTOR = ThreadPoolExecutor(max_workers=8)
 ADMIN_TOKEN = None
 USER1_TOKEN = None
 USER2_TOKEN = None
@@ -38,44 +59,45 @@ MAGENTA = '\033[95m'
 RESET = '\033[0m'
 BOLD = '\033[1m'
 
+# Each helper below writes its whole block in one call instead of a print()
+# per line
+
 def print_section(title: str):
     """Print a section header"""
-    print(f"\n{BLUE}{'=' * 80}{RESET}")
-    print(f"{BLUE}{BOLD}{title}{RESET}")
-    print(f"{BLUE}{'=' * 80}{RESET}")
+    rule = f"{BLUE}{'=' * 80}{RESET}"
+    sys.stdout.write(f"\n{rule}\n{BLUE}{BOLD}{title}{RESET}\n{rule}\n")
 
 def print_test(test_name: str, passed: bool, details: str = ""):
     """Pretty print test results"""
     status = f"{GREEN}✅ PASS{RESET}" if passed else f"{RED}❌ FAIL{RESET}"
-    print(f"  {status}: {test_name}")
+    line = f"  {status}: {test_name}\n"
     if details:
-        print(f"           {CYAN}{details}{RESET}")
+        line += f"           {CYAN}{details}{RESET}\n"
+    sys.stdout.write(line)
 
 def print_subsection(title: str):
     """Print a subsection header"""
-    print(f"\n{YELLOW}▶ {title}{RESET}")
+    sys.stdout.write(f"\n{YELLOW}▶ {title}{RESET}\n")
 
 def print_requirement(req_text: str):
     """Print the exact requirement text being tested"""
-    print(f"\n{MAGENTA}📋 REQUIREMENT: {req_text}{RESET}")
+    sys.stdout.write(f"\n{MAGENTA}📋 REQUIREMENT: {req_text}{RESET}\n")
+
+def get_all(paths: List[str], headers: Dict[str, str]) -> List[requests.Response]:
+    """GET several independent endpoints at once; responses come back in order"""
+    return list(EXECUTOR.map(
+        lambda path: SESSION.get(f"{BASE_URL}{path}", headers=headers), paths
+    ))
 
-def get_test_token(is_admin: bool = True) -> str:
-    """Get a test JWT token"""
+def get_test_token() -> str:
+    """
+    Get a test JWT token
+    /test-token already makes its user an admin, so one request is enough
+    """
     try:
-        response = requests.post(f"{BASE_URL}/test-token")
+        response = SESSION.post(f"{BASE_URL}/test-token")
         if response.status_code == 200:
-            token = response.json()["token"]
-            
-            # Make the first user admin if requested
-            if is_admin:
-                # Get user info and make them admin in DB if needed
-                headers = {"Authorization": f"Bearer {token}"}
-                me_response = requests.get(f"{BASE_URL}/me", headers=headers)
-                if me_response.status_code == 200:
-                    user_data = me_response.json()
-                    # In a real test, we'd update the DB here
-            
-            return token
+            return response.json()["token"]
         else:
             raise Exception(f"Failed to get token: {response.status_code}")
     except requests.exceptions.ConnectionError:
@@ -101,7 +123,7 @@ def test_authentication():
     # TEST: OAuth flow can be initiated with a CLI token
     # This simulates the CLI generating a unique token and opening browser
     cli_token = f"test-cli-{int(time.time())}"
-    response = requests.get(f"{BASE_URL}/auth/github/start?cli_token={cli_token}")
+    response = SESSION.get(f"{BASE_URL}/auth/github/start?cli_token={cli_token}")
     passed = response.status_code in [200, 302]  # Should redirect to GitHub
     print_test(
         "GitHub OAuth flow starts from CLI", 
@@ -119,7 +141,7 @@ def test_authentication():
     
     # TEST: CLI can poll for authentication completion
     # After browser auth, CLI polls this endpoint to get JWT
-    response = requests.get(f"{BASE_URL}/auth/cli-exchange?cli_token={cli_token}")
+    response = SESSION.get(f"{BASE_URL}/auth/cli-exchange?cli_token={cli_token}")
     # Will be 404 since we didn't complete real OAuth, but endpoint exists
     passed = response.status_code in [404, 200]
     print_test(
@@ -139,7 +161,7 @@ def test_authentication():
     print_subsection("Session Persistence")
     
     # TEST: JWT tokens work for authentication
-    response = requests.get(f"{BASE_URL}/me", headers={"Authorization": f"Bearer {ADMIN_TOKEN}"})
+    response = SESSION.get(f"{BASE_URL}/me", headers={"Authorization": f"Bearer {ADMIN_TOKEN}"})
     passed = response.status_code == 200
     print_test(
         "JWT tokens authenticate requests", 
@@ -147,15 +169,26 @@ def test_authentication():
         "Tokens can be saved to disk by CLI"
     )
     
-    # TEST: Tokens are long-lived
+    # TEST: Short-lived JWTs are renewed with a refresh token
+    refresh_token = SESSION.post(f"{BASE_URL}/test-token").json().get("refresh_token")
+    response = SESSION.post(f"{BASE_URL}/auth/refresh", json={"refresh_token": refresh_token})
+    passed = response.status_code == 200 and "token" in response.json()
     print_test(
-        "Sessions persist (7-day JWT expiry)", 
-        True,
-        "CLI saves token to ~/.config/secret-cli/"
+        "Sessions persist (refresh token renews 15-minute JWT)", 
+        passed,
+        "CLI saves both tokens to ~/.config/secret-cli/"
+    )
+    
+    # TEST: Refresh tokens are single-use
+    response = SESSION.post(f"{BASE_URL}/auth/refresh", json={"refresh_token": refresh_token})
+    print_test(
+        "Refresh tokens work only once", 
+        response.status_code == 401,
+        f"Reusing a refresh token: {response.status_code}"
     )
     
     # TEST: Protected endpoints require authentication
-    response = requests.get(f"{BASE_URL}/me")
+    response = SESSION.get(f"{BASE_URL}/me")
     passed = response.status_code == 401
     print_test(
         "Protected endpoints require auth", 
@@ -178,11 +211,16 @@ def test_organization_structure():
     
     headers = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
     
+    # These reads don't depend on each other, so fetch them together
+    me_response, my_teams_response, teams_response, users_response = get_all(
+        ["/me", "/teams/mine", "/teams", "/users"], headers
+    )
+    
     print_requirement("Users must belong to one organization")
     print_subsection("Organization Membership")
     
     # TEST: User belongs to exactly one organization
-    response = requests.get(f"{BASE_URL}/me", headers=headers)
+    response = me_response
     if response.status_code == 200:
         data = response.json()
         has_org = "organization" in data and data["organization"] is not None
@@ -205,7 +243,7 @@ def test_organization_structure():
     print_subsection("Team Membership")
     
     # TEST: User can be in multiple teams
-    response = requests.get(f"{BASE_URL}/teams/mine", headers=headers)
+    response = my_teams_response
     if response.status_code == 200:
         teams = response.json().get("teams", [])
         print_test(
@@ -225,7 +263,7 @@ def test_organization_structure():
     print_subsection("Organization Visibility")
     
     # TEST: Can list all teams in organization
-    response = requests.get(f"{BASE_URL}/teams", headers=headers)
+    response = teams_response
     passed = response.status_code == 200 and "teams" in response.json()
     team_count = len(response.json().get("teams", [])) if passed else 0
     print_test(
@@ -235,7 +273,7 @@ def test_organization_structure():
     )
     
     # TEST: Can list all users in organization
-    response = requests.get(f"{BASE_URL}/users", headers=headers)
+    response = users_response
     passed = response.status_code == 200 and "users" in response.json()
     user_count = len(response.json().get("users", [])) if passed else 0
     print_test(
@@ -266,7 +304,7 @@ def test_admin_operations():
     print_subsection("Admin Organization Membership")
     
     # TEST: Admin belongs to organization
-    response = requests.get(f"{BASE_URL}/me", headers=headers)
+    response = SESSION.get(f"{BASE_URL}/me", headers=headers)
     if response.status_code == 200:
         data = response.json()
         is_admin = data.get("user", {}).get("is_admin", False)
@@ -289,7 +327,7 @@ def test_admin_operations():
     
     # TEST: Admin can create new users
     test_email = f"test-user-{int(time.time())}@example.com"
-    response = requests.post(
+    response = SESSION.post(
         f"{BASE_URL}/admin/users",
         params={"email": test_email, "name": "Test User", "is_admin": False},
         headers=headers
@@ -311,7 +349,7 @@ def test_admin_operations():
     
     # TEST: Admin can create teams
     team_name = f"TestTeam-{int(time.time())}"
-    response = requests.post(
+    response = SESSION.post(
         f"{BASE_URL}/teams?name={team_name}",
         headers=headers
     )
@@ -332,7 +370,7 @@ def test_admin_operations():
     
     # TEST: Admin can promote users to admin
     if CREATED_USERS:
-        response = requests.put(
+        response = SESSION.put(
             f"{BASE_URL}/admin/users/{CREATED_USERS[0]}/promote",
             headers=headers
         )
@@ -348,7 +386,7 @@ def test_admin_operations():
     
     if CREATED_USERS and CREATED_TEAMS:
         # TEST: Add user to team
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/teams/{CREATED_TEAMS[0]}/members?user_id={CREATED_USERS[0]}",
             headers=headers
         )
@@ -360,7 +398,7 @@ def test_admin_operations():
         )
         
         # TEST: Remove user from team
-        response = requests.delete(
+        response = SESSION.delete(
             f"{BASE_URL}/teams/{CREATED_TEAMS[0]}/members/{CREATED_USERS[0]}",
             headers=headers
         )
@@ -376,7 +414,7 @@ def test_admin_operations():
     
     # TEST: Delete user
     if len(CREATED_USERS) > 1:  # Keep one for later tests
-        response = requests.delete(
+        response = SESSION.delete(
             f"{BASE_URL}/admin/users/{CREATED_USERS[-1]}",
             headers=headers
         )
@@ -387,7 +425,7 @@ def test_admin_operations():
     
     # TEST: Delete team
     if len(CREATED_TEAMS) > 1:  # Keep one for later tests
-        response = requests.delete(
+        response = SESSION.delete(
             f"{BASE_URL}/admin/teams/{CREATED_TEAMS[-1]}",
             headers=headers
         )
@@ -422,7 +460,7 @@ def test_secret_management():
         "acl_entries": []
     }
     
-    response = requests.post(
+    response = SESSION.post(
         f"{BASE_URL}/secrets",
         headers=headers,
         json=secret_data
@@ -443,7 +481,7 @@ def test_secret_management():
     print_subsection("List Authorized Secrets")
     
     # TEST: List secrets user can access
-    response = requests.get(f"{BASE_URL}/secrets", headers=headers)
+    response = SESSION.get(f"{BASE_URL}/secrets", headers=headers)
     if response.status_code == 200:
         secrets = response.json()
         print_test(
@@ -480,7 +518,7 @@ def test_secret_management():
         "value": "initial-value",
         "acl_entries": []
     }
-    response = requests.post(f"{BASE_URL}/secrets", headers=headers, json=new_secret)
+    response = SESSION.post(f"{BASE_URL}/secrets", headers=headers, json=new_secret)
     if response.status_code == 201:
         created_id = response.json()["id"]
         CREATED_SECRETS.append(created_id)
@@ -491,7 +529,7 @@ def test_secret_management():
             "value": "updated-value",
             "acl_entries": None  # Don't change ACL
         }
-        response = requests.put(
+        response = SESSION.put(
             f"{BASE_URL}/secrets/{created_id}",
             headers=headers,
             json=update_data
@@ -531,11 +569,11 @@ def test_authorization_sharing():
     print_subsection("User-Level Sharing")
     
     # Get users to share with
-    response = requests.get(f"{BASE_URL}/users", headers=headers)
+    response = SESSION.get(f"{BASE_URL}/users", headers=headers)
     users = response.json().get("users", [])
     
     # Get current user ID
-    me_response = requests.get(f"{BASE_URL}/me", headers=headers)
+    me_response = SESSION.get(f"{BASE_URL}/me", headers=headers)
     my_id = me_response.json()["user"]["id"]
     
     # Find other users
@@ -558,7 +596,7 @@ def test_authorization_sharing():
             "acl_entries": acl_entries
         }
         
-        response = requests.post(f"{BASE_URL}/secrets", headers=headers, json=secret_data)
+        response = SESSION.post(f"{BASE_URL}/secrets", headers=headers, json=secret_data)
         if response.status_code == 201:
             CREATED_SECRETS.append(response.json()["id"])
             user_names = ", ".join(u["name"] for u in other_users)
@@ -589,7 +627,7 @@ def test_authorization_sharing():
             }]
         }
         
-        response = requests.post(f"{BASE_URL}/secrets", headers=headers, json=secret_data)
+        response = SESSION.post(f"{BASE_URL}/secrets", headers=headers, json=secret_data)
         if response.status_code == 201:
             CREATED_SECRETS.append(response.json()["id"])
             print_test(
@@ -615,7 +653,7 @@ def test_authorization_sharing():
         }]
     }
     
-    response = requests.post(f"{BASE_URL}/secrets", headers=headers, json=secret_data)
+    response = SESSION.post(f"{BASE_URL}/secrets", headers=headers, json=secret_data)
     if response.status_code == 201:
         CREATED_SECRETS.append(response.json()["id"])
         print_test(
@@ -664,7 +702,7 @@ def test_authorization_sharing():
         "acl_entries": complex_acl
     }
     
-    response = requests.post(f"{BASE_URL}/secrets", headers=headers, json=secret_data)
+    response = SESSION.post(f"{BASE_URL}/secrets", headers=headers, json=secret_data)
     if response.status_code == 201:
         CREATED_SECRETS.append(response.json()["id"])
         print_test(
@@ -694,7 +732,7 @@ def test_authorization_sharing():
             )
     
     # TEST: Verify permissions are enforced
-    response = requests.get(f"{BASE_URL}/secrets", headers=headers)
+    response = SESSION.get(f"{BASE_URL}/secrets", headers=headers)
     if response.status_code == 200:
         secrets = response.json()
         my_secrets = [s for s in secrets if s.get("is_creator", False)]
@@ -741,9 +779,13 @@ def test_cli_operations():
         "Client-side (delete stored token)"
     )
     
+    # The list operations are independent reads - run them together
+    secrets_response, teams_response, users_response = get_all(
+        ["/secrets", "/teams", "/users"], headers
+    )
+    
     # TEST: List all K/V pairs visible to you
-    response = requests.get(f"{BASE_URL}/secrets", headers=headers)
-    passed = response.status_code == 200
+    passed = secrets_response.status_code == 200
     print_test(
         "Operation: List all K/V pairs visible", 
         passed,
@@ -751,10 +793,8 @@ def test_cli_operations():
     )
     
     # TEST: List all teams and users in org
-    response = requests.get(f"{BASE_URL}/teams", headers=headers)
-    passed1 = response.status_code == 200
-    response = requests.get(f"{BASE_URL}/users", headers=headers)
-    passed2 = response.status_code == 200
+    passed1 = teams_response.status_code == 200
+    passed2 = users_response.status_code == 200
     print_test(
         "Operation: List teams and users", 
         passed1 and passed2,
@@ -829,7 +869,7 @@ def test_interface_requirements():
     headers = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
     
     # TEST: API returns structured JSON for easy React rendering
-    response = requests.get(f"{BASE_URL}/secrets", headers=headers)
+    response = SESSION.get(f"{BASE_URL}/secrets", headers=headers)
     if response.status_code == 200:
         data = response.json()
         is_array = isinstance(data, list)
@@ -841,7 +881,7 @@ def test_interface_requirements():
         )
     
     # TEST: API supports filtering/searching (for smart interface)
-    response = requests.get(f"{BASE_URL}/secrets?query=test", headers=headers)
+    response = SESSION.get(f"{BASE_URL}/secrets?query=test", headers=headers)
     passed = response.status_code == 200
     print_test(
         "API supports search/filter", 
@@ -850,7 +890,7 @@ def test_interface_requirements():
     )
     
     # TEST: Clean error messages for UI display
-    response = requests.get(f"{BASE_URL}/secrets/99999", headers=headers)
+    response = SESSION.get(f"{BASE_URL}/secrets/99999", headers=headers)
     if response.status_code == 404:
         body = response.json() if response.content else {}
         has_detail = "detail" in body
@@ -890,7 +930,7 @@ def test_complete_workflow():
         
         # STEP 2: Admin creates a team
         print_subsection("Step 2: Admin creates team 'Engineering'")
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/teams?name=Engineering",
             headers=headers
         )
@@ -906,7 +946,7 @@ def test_complete_workflow():
         print_subsection("Step 3: Admin creates two users")
         
         # Create Alice
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/admin/users",
             params={
                 "email": "alice@example.com",
@@ -921,7 +961,7 @@ def test_complete_workflow():
             print_test("User 'Alice' created", True)
         
         # Create Bob
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/admin/users",
             params={
                 "email": "bob@example.com",
@@ -940,7 +980,7 @@ def test_complete_workflow():
         
         for user_id in [workflow_items.get("alice_id"), workflow_items.get("bob_id")]:
             if user_id:
-                response = requests.post(
+                response = SESSION.post(
                     f"{BASE_URL}/teams/{workflow_items['team_id']}/members?user_id={user_id}",
                     headers=headers
                 )
@@ -960,7 +1000,7 @@ def test_complete_workflow():
                 "can_write": False  # Read-only for team
             }]
         }
-        response = requests.post(f"{BASE_URL}/secrets", headers=headers, json=secret1)
+        response = SESSION.post(f"{BASE_URL}/secrets", headers=headers, json=secret1)
         if response.status_code == 201:
             CREATED_SECRETS.append(response.json()["id"])
             print_test("Database password (team read-only)", True)
@@ -977,7 +1017,7 @@ def test_complete_workflow():
                     "can_write": True  # Alice can update
                 }]
             }
-            response = requests.post(f"{BASE_URL}/secrets", headers=headers, json=secret2)
+            response = SESSION.post(f"{BASE_URL}/secrets", headers=headers, json=secret2)
             if response.status_code == 201:
                 CREATED_SECRETS.append(response.json()["id"])
                 print_test("API key (Alice has write)", True)
@@ -993,7 +1033,7 @@ def test_complete_workflow():
                 "can_write": False
             }]
         }
-        response = requests.post(f"{BASE_URL}/secrets", headers=headers, json=secret3)
+        response = SESSION.post(f"{BASE_URL}/secrets", headers=headers, json=secret3)
         if response.status_code == 201:
             CREATED_SECRETS.append(response.json()["id"])
             print_test("Company announcement (org-wide read)", True)
@@ -1001,7 +1041,7 @@ def test_complete_workflow():
         # STEP 6: Verify permissions are working
         print_subsection("Step 6: Verify authorization model")
         
-        response = requests.get(f"{BASE_URL}/secrets", headers=headers)
+        response = SESSION.get(f"{BASE_URL}/secrets", headers=headers)
         if response.status_code == 200:
             secrets = response.json()
             
@@ -1024,7 +1064,7 @@ def test_complete_workflow():
         # STEP 7: Promote Bob to admin
         print_subsection("Step 7: Promote Bob to admin")
         if workflow_items.get("bob_id"):
-            response = requests.put(
+            response = SESSION.put(
                 f"{BASE_URL}/admin/users/{workflow_items['bob_id']}/promote",
                 headers=headers
             )
@@ -1049,30 +1089,67 @@ def cleanup():
     print_section("Cleanup")
     
     headers = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
+    timeout = (2, 5)  # connect, read - a stuck request can't stall cleanup
     
-    # Delete secrets
-    for secret_id in CREATED_SECRETS:
-        try:
-            requests.delete(f"{BASE_URL}/secrets/{secret_id}", headers=headers)
-        except:
-            pass
-    print_test(f"Cleaned up {len(CREATED_SECRETS)} secrets", True)
-    
-    # Delete teams
-    for team_id in CREATED_TEAMS:
-        try:
-            requests.delete(f"{BASE_URL}/admin/teams/{team_id}", headers=headers)
-        except:
-            pass
-    print_test(f"Cleaned up {len(CREATED_TEAMS)} teams", True)
+    # Everything in one request (one DELETE per table on the server)
+    try:
+        response = SESSION.post(f"{BASE_URL}/admin/bulk-delete", headers=headers, json={
+            "secrets": CREATED_SECRETS,
+            "teams": CREATED_TEAMS,
+            "users": CREATED_USERS
+        }, timeout=timeout)
+    except requests.RequestException:
+        response = None
+    created = {"secrets": CREATED_SECRETS, "teams": CREATED_TEAMS, "users": CREATED_USERS}
+    # Done only if the server says it deleted everything we sent
+    if response is not None and response.status_code == 200:
+        deleted = response.json().get("deleted", {})
+        if all(deleted.get(kind) == len(ids) for kind, ids in created.items()):
+            for kind, ids in created.items():
+                print_test(f"Cleaned up {len(ids)} {kind}", True)
+            return
     
-    # Delete users
-    for user_id in CREATED_USERS:
-        try:
-            requests.delete(f"{BASE_URL}/admin/users/{user_id}", headers=headers)
-        except:
-            pass
-    print_test(f"Cleaned up {len(CREATED_USERS)} users", True)
+    # Older backends without bulk delete, or leftovers: one request per item,
+    # in parallel (already deleted items just 404)
+    # URL prefixes built once, not per item
+    prefixes = {
+        "secrets": f"{BASE_URL}/secrets/",
+        "teams": f"{BASE_URL}/admin/teams/",
+        "users": f"{BASE_URL}/admin/users/",
+    }
+    # Secrets and teams never touch each other's rows, so they go together;
+    # users go after the teams, once their memberships are gone
+    stages = [("secrets", "teams"), ("users",)]
+    
+    def delete_all(items: List[Tuple[str, int]]) -> List[Tuple[str, int]]:
+        """Delete (kind, ID) pairs stage by stage; returns the ones that failed"""
+        session_delete = SESSION.delete
+        def delete_one(item: Tuple[str, int]) -> bool:
+            kind, item_id = item
+            try:
+                response = session_delete(prefixes[kind] + str(item_id), headers=headers, timeout=timeout)
+            except requests.RequestException:
+                return False
+            return response.ok or response.status_code == 404  # 404: already gone
+        failed = []
+        for stage in stages:
+            batch = [item for item in items if item[0] in stage]
+            failed += [item for item, ok in zip(batch, EXECUTOR.map(delete_one, batch)) if not ok]
+        return failed
+    
+    # 1. One pass over everything, collecting failures instead of hiding them
+    failed = delete_all([(kind, item_id) for kind, ids in created.items() for item_id in ids])
+    
+    # 2. Retry the failures once, then report anything left
+    if failed:
+        failed = delete_all(failed)
+    for kind, ids in created.items():
+        left = [item_id for failed_kind, item_id in failed if failed_kind == kind]
+        print_test(
+            f"Cleaned up {len(ids) - len(left)} {kind}",
+            not left,
+            f"Could not delete: {left}" if left else ""
+        )
 
 # ============================================================================
 # MAIN TEST RUNNER
@@ -1099,13 +1176,13 @@ def main():
     global ADMIN_TOKEN
     try:
         # Check backend is running
-        response = requests.get(f"{BASE_URL}/health")
+        response = SESSION.get(f"{BASE_URL}/health")
         if response.status_code != 200:
             raise Exception("Backend not healthy")
         print_test("✓ Backend is running", True, f"Health check passed at {BASE_URL}")
         
         # Get admin token for testing
-        ADMIN_TOKEN = get_test_token(is_admin=True)
+        ADMIN_TOKEN = get_test_token()
         print_test("✓ Admin token acquired", True, "Ready to test all requirements")
         
     except Exception as e:
@@ -1126,7 +1203,8 @@ def main():
         test_complete_workflow       # INTEGRATION: Everything together
     ]
     
-    # Execute each test section
+    # Execute each test section, in order (later sections reuse what earlier
+    # ones created); a request that times out only fails its own section
     for test_func in test_functions:
         try:
             test_func()
@@ -1197,7 +1275,7 @@ if __name__ == "__main__":
             print("Running quick test subset...")
             # Could implement a quick test mode here
         elif sys.argv[1] == "--cleanup":
-            ADMIN_TOKEN = get_test_token(is_admin=True)
+            ADMIN_TOKEN = get_test_token()
             cleanup()
             print("Cleanup complete")
             sys.exit(0)
@@ -13,9 +13,11 @@ Tests all authentication components including:
 
 import os
 import pytest
+from contextlib import contextmanager
 from unittest.mock import Mock, patch
 from datetime import datetime, timedelta
 from jose import jwt
+import orjson
 from fastapi.testclient import TestClient
 
 # Set test environment variables before importing app
@@ -25,22 +27,54 @@ os.environ.update({
     "JWT_SECRET": "test_jwt_secret_key",
     "STATE_SECRET": "test_state_secret_key",
     "BASE_URL": "http://localhost:8001",
-    "ADMIN_EMAILS": "admin1@test.com,admin2@test.com"
+    "ADMIN_EMAILS": "admin1@test.com,admin2@test.com",
+    "ENV": "development"
 })
 
-from app.main import app
+from sqlalchemy import event, inspect
+from sqlmodel import SQLModel, select
+from app import crud
+from starlette.requests import Request
+from app import main as app_main
+from app.main import app, engine, new_session
+from app.models import TeamMembership, User
 from app.auth import (
     create_jwt_token,
     verify_jwt_token,
     create_state,
     verify_state,
     get_github_user,
-    pending_tokens
+    cached_user_id,
+    remember_user_id,
+    invalidate_token
 )
-from app.config import settings
+from app.config import Settings, settings
 
 client = TestClient(app)
 
+# TestClient doesn't run the startup hook; pending logins live in the database
+SQLModel.metadata.create_all(engine)
+
+def store_pending_token(cli_token, data):
+    with new_session() as session:
+        crud.store_pending_login(session, cli_token, data)
+
+def take_pending_token(cli_token):
+    with new_session() as session:
+        return crud.take_pending_login(session, cli_token)
+
+@contextmanager
+def count_queries():
+    """Collect every SQL statement the app sends while the block runs."""
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
 
 class TestPhase1A:
     """Test 1A: Health Check Endpoint"""
@@ -90,11 +124,11 @@ class TestPhase1C:
         assert settings.jwt_secret == "test_jwt_secret_key"
         assert settings.state_secret == "test_state_secret_key"
         assert settings.jwt_algorithm == "HS256"
-        assert settings.jwt_expiry_days == 7
+        assert settings.access_token_ttl_minutes == 15
         
     def test_admin_emails_parsing(self):
         """Test that admin emails are parsed correctly from comma-separated string"""
-        admin_emails = settings.get_admin_emails_list()
+        admin_emails = settings.admin_emails
         assert len(admin_emails) == 2
         assert "admin1@test.com" in admin_emails
         assert "admin2@test.com" in admin_emails
@@ -102,7 +136,12 @@ class TestPhase1C:
     def test_config_defaults(self):
         """Test that configuration defaults are set properly"""
         assert settings.jwt_algorithm == "HS256"
-        assert settings.jwt_expiry_days == 7
+        assert settings.access_token_ttl_minutes == 15
+        
+    def test_dev_endpoints_off_by_default(self):
+        """Test that test endpoints are only registered when ENV=development"""
+        assert Settings.model_fields["env"].default == "production"
+        assert settings.env == "development"
 
 
 class TestPhase1D:
@@ -127,22 +166,27 @@ class TestPhase1D:
         token = create_jwt_token(user_data)
         
         # Decode without verification to check claims
-        decoded = jwt.decode(token, key="", options={"verify_signature": False})
+        decoded = jwt.decode(token, key="", options={"verify_signature": False, "verify_aud": False})
         assert "exp" in decoded
         
     def test_jwt_token_expiry_time(self):
-        """Test that JWT token expires in correct number of days"""
+        """Test that JWT token expires in correct number of minutes"""
         user_data = {"sub": "12345"}
         token = create_jwt_token(user_data)
         
-        decoded = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+        decoded = jwt.decode(
+            token,
+            settings.jwt_secret,
+            algorithms=[settings.jwt_algorithm],
+            audience=settings.jwt_audience
+        )
         exp_timestamp = decoded["exp"]
         
-        # The token should expire in approximately 7 days
+        # The token should expire in approximately 15 minutes
         # Just check that exp is in the future and reasonable
         now = datetime.utcnow().timestamp()
         assert exp_timestamp > now  # Token not expired
-        assert exp_timestamp < now + (8 * 24 * 60 * 60)  # Less than 8 days
+        assert exp_timestamp < now + (16 * 60)  # Less than 16 minutes
         
     def test_verify_valid_jwt_token(self):
         """Test verification of a valid JWT token"""
@@ -181,6 +225,34 @@ class TestPhase1D:
         verified_data = verify_jwt_token(expired_token)
         assert verified_data is None
         
+    def test_verify_rejects_foreign_audience(self):
+        """Test that tokens signed with our secret but meant for another audience are rejected"""
+        foreign_token = jwt.encode(
+            {
+                "sub": "12345",
+                "exp": datetime.utcnow() + timedelta(days=1),
+                "iss": settings.base_url,
+                "aud": "some-other-service"
+            },
+            settings.jwt_secret,
+            algorithm=settings.jwt_algorithm
+        )
+        
+        verified_data = verify_jwt_token(foreign_token)
+        assert verified_data is None
+        
+    def test_token_user_cache(self):
+        """Test that a verified token remembers its user until invalidated"""
+        token = create_jwt_token({"sub": "12345", "email": "test@example.com"})
+        payload = verify_jwt_token(token)
+        assert cached_user_id(token) is None
+        
+        remember_user_id(token, payload, 42)
+        assert cached_user_id(token) == (42, "12345")
+        
+        invalidate_token(token)
+        assert cached_user_id(token) is None
+        
     def test_test_token_endpoint(self):
         """Test the /test-token endpoint creates valid tokens"""
         response = client.post("/test-token")
@@ -190,8 +262,9 @@ class TestPhase1D:
         assert "token" in data
         assert "type" in data
         assert data["type"] == "Bearer"
-        assert "expires_in_days" in data
-        assert data["expires_in_days"] == 7
+        assert "expires_in_minutes" in data
+        assert data["expires_in_minutes"] == 15
+        assert "refresh_token" in data
         
         # Verify the token is valid
         verified = verify_jwt_token(data["token"])
@@ -250,10 +323,10 @@ class TestPhase1E:
         # Manually add a pending token
         cli_token = "test_cli_token_exchange"
         test_jwt = create_jwt_token({"sub": "123", "email": "test@example.com"})
-        pending_tokens[cli_token] = {
+        store_pending_token(cli_token, {
             "token": test_jwt,
             "user": {"id": 123, "login": "testuser"}
-        }
+        })
         
         response = client.get(f"/auth/cli-exchange?cli_token={cli_token}")
         assert response.status_code == 200
@@ -264,7 +337,7 @@ class TestPhase1E:
         assert "user" in data
         
         # Verify token was removed (one-time use)
-        assert cli_token not in pending_tokens
+        assert take_pending_token(cli_token) is None
 
 
 class TestPhase1F:
@@ -379,19 +452,19 @@ class TestPhase1H:
             # Mock user endpoint response
             user_response = Mock()
             user_response.status_code = 200
-            user_response.json.return_value = {
+            user_response.content = orjson.dumps({
                 "id": 12345,
                 "login": "testuser",
                 "name": "Test User"
-            }
+            })
             
             # Mock emails endpoint response
             emails_response = Mock()
             emails_response.status_code = 200
-            emails_response.json.return_value = [
+            emails_response.content = orjson.dumps([
                 {"email": "test@github.com", "primary": True, "verified": True},
                 {"email": "alt@github.com", "primary": False, "verified": True}
-            ]
+            ])
             
             # Set up side effects for multiple calls
             mock_get.side_effect = [user_response, emails_response]
@@ -421,18 +494,18 @@ class TestPhase1H:
             # Mock user endpoint response
             user_response = Mock()
             user_response.status_code = 200
-            user_response.json.return_value = {
+            user_response.content = orjson.dumps({
                 "id": 12345,
                 "login": "testuser",
                 "name": "Test User"
-            }
+            })
             
             # Mock emails endpoint response with no verified emails
             emails_response = Mock()
             emails_response.status_code = 200
-            emails_response.json.return_value = [
+            emails_response.content = orjson.dumps([
                 {"email": "test@github.com", "primary": True, "verified": False}
-            ]
+            ])
             
             mock_get.side_effect = [user_response, emails_response]
             
@@ -449,10 +522,10 @@ class TestPhase1H:
             # Mock user endpoint success but emails endpoint failure
             user_response = Mock()
             user_response.status_code = 200
-            user_response.json.return_value = {
+            user_response.content = orjson.dumps({
                 "id": 12345,
                 "login": "testuser"
-            }
+            })
             
             emails_response = Mock()
             emails_response.status_code = 500  # Server error
@@ -488,10 +561,10 @@ class TestIntegrationPhase1:
             "email": "integration@test.com",
             "name": "Integration Test"
         })
-        pending_tokens[cli_token] = {
+        store_pending_token(cli_token, {
             "token": test_jwt,
             "user": {"id": 123, "login": "integrationtest"}
-        }
+        })
         
         # Step 4: CLI exchanges token
         response = client.get(f"/auth/cli-exchange?cli_token={cli_token}")
@@ -532,6 +605,238 @@ class TestIntegrationPhase1:
                 assert response.status_code == expected_status, f"Unexpected status for {path}"
 
 
+class TestRefreshTokens:
+    """Refresh tokens die with their user, even if the user's ID is reused"""
+    
+    def _admin_headers(self):
+        return {"Authorization": "Bearer " + client.post("/test-token").json()["token"]}
+    
+    def _new_user_with_token(self, tag):
+        with new_session() as session:
+            user = crud.get_or_create_user(
+                session, f"{tag}-{os.urandom(4).hex()}@test.com", tag, f"{tag}-{os.urandom(4).hex()}"
+            )
+            return user.id, crud.issue_refresh_token(session, user)
+    
+    def test_deleted_user_refresh_token_is_rejected(self):
+        """Test that deleting a user revokes their refresh tokens"""
+        headers = self._admin_headers()
+        user_id, refresh_token = self._new_user_with_token("refresh-delete")
+        
+        response = client.delete(f"/admin/users/{user_id}", headers=headers)
+        assert response.status_code == 200
+        
+        response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+        assert response.status_code == 401
+    
+    def test_bulk_deleted_user_refresh_token_is_rejected(self):
+        """Test that bulk-deleting a user revokes their refresh tokens"""
+        headers = self._admin_headers()
+        user_id, refresh_token = self._new_user_with_token("refresh-bulk")
+        
+        response = client.post("/admin/bulk-delete", headers=headers, json={"users": [user_id]})
+        assert response.status_code == 200
+        assert response.json()["deleted"]["users"] == 1
+        
+        response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+        assert response.status_code == 401
+    
+    def test_refresh_token_does_not_carry_over_to_reused_id(self):
+        """Test that a token left behind by a deleted user can't log in its ID's next owner"""
+        user_id, refresh_token = self._new_user_with_token("refresh-reuse")
+        
+        # Delete the user the way older code did (token left behind), then
+        # give their ID to someone new
+        with new_session() as session:
+            session.delete(session.get(User, user_id))
+            session.commit()
+        with new_session() as session:
+            session.add(User(
+                id=user_id, email=f"reused-{os.urandom(4).hex()}@test.com",
+                name="Reused", github_id=f"reused-{os.urandom(4).hex()}"
+            ))
+            session.commit()
+        
+        with new_session() as session:
+            assert crud.rotate_refresh_token(session, refresh_token) is None
+    
+    def test_refresh_token_works_once(self):
+        """Test that a refresh token is single-use"""
+        _, refresh_token = self._new_user_with_token("refresh-once")
+        
+        first = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+        second = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+        assert first.status_code == 200
+        assert second.status_code == 401
+
+    
+    def test_access_token_does_not_carry_over_to_reused_id(self):
+        """Test that a deleted user's access token can't act as its ID's next owner"""
+        sub = f"token-reuse-{os.urandom(4).hex()}"
+        headers = {"Authorization": "Bearer " + create_jwt_token(
+            {"sub": sub, "email": f"{sub}@test.com", "name": "Token Reuse"})}
+        user_id = client.get("/me", headers=headers).json()["user"]["id"]
+        
+        response = client.delete(f"/admin/users/{user_id}", headers=self._admin_headers())
+        assert response.status_code == 200
+        with new_session() as session:
+            session.add(User(
+                id=user_id, email=f"reused-{os.urandom(4).hex()}@test.com",
+                name="Reused", github_id=f"reused-{os.urandom(4).hex()}"
+            ))
+            session.commit()
+        
+        me = client.get("/me", headers=headers).json()["user"]
+        assert me["id"] != user_id
+        assert me["email"] == f"{sub}@test.com"
+    
+    def test_user_cache_checks_identity(self):
+        """Test that cached users are only returned to their own GitHub account"""
+        sub = f"cache-identity-{os.urandom(4).hex()}"
+        token = create_jwt_token({"sub": sub, "email": f"{sub}@test.com"})
+        with new_session() as session:
+            user = crud.get_or_create_user(session, f"{sub}@test.com", "Cache Identity", sub)
+            remember_user_id(token, verify_jwt_token(token), user.id)
+            
+            assert crud.load_user(session, user.id, sub) is not None
+            assert crud.load_user(session, user.id, "someone-else") is None
+            
+            crud.forget_user(user)
+            assert cached_user_id(token) is None
+
+class TestTimestamps:
+    """A secret's timestamps serialize the same however it was loaded"""
+    
+    def test_created_at_matches_across_endpoints(self):
+        """Test that create, get and list return identical created_at values"""
+        headers = {"Authorization": "Bearer " + client.post("/test-token").json()["token"]}
+        created = client.post("/secrets", headers=headers, json={
+            "key": f"TS_{os.urandom(4).hex()}", "value": "v"
+        }).json()
+        
+        fetched = client.get(f"/secrets/{created['id']}", headers=headers).json()
+        listed = next(
+            s for s in client.get("/secrets", headers=headers).json() if s["id"] == created["id"]
+        )
+        
+        assert created["created_at"] == fetched["created_at"] == listed["created_at"]
+        assert created["created_at"].endswith("+00:00")
+    
+    def test_team_created_at_matches_across_endpoints(self):
+        """Test that create, list and members return identical team created_at values"""
+        headers = {"Authorization": "Bearer " + client.post("/test-token").json()["token"]}
+        created = client.post("/teams", headers=headers, params={
+            "name": f"ts-{os.urandom(4).hex()}"
+        }).json()["team"]
+        
+        members = client.get(f"/teams/{created['id']}/members", headers=headers).json()
+        listed = next(
+            t for t in client.get("/teams", headers=headers).json()["teams"] if t["id"] == created["id"]
+        )
+        
+        assert created["created_at"] == members["team"]["created_at"] == listed["created_at"]
+        assert created["created_at"].endswith("+00:00")
+
+class TestListingCache:
+    """Cached listings never outlive a change that happened while building them"""
+    
+    def test_body_built_during_a_change_is_not_cached(self):
+        """Test that a listing invalidated mid-build isn't stored"""
+        request = Request({"type": "http", "headers": []})
+        key = ("teams", -1, None)
+        
+        def build():
+            # A mutation commits and clears the org while we are reading
+            app_main._forget_org_listings(-1)
+            return {"teams": []}
+        
+        app_main._cached_json(request, key, build)
+        assert key not in app_main._listing_cache
+        
+        app_main._cached_json(request, key, lambda: {"teams": []})
+        assert key in app_main._listing_cache
+    
+    def test_first_login_shows_up_in_cached_user_list(self):
+        """Test that a user created by logging in appears in a cached /users"""
+        headers = {"Authorization": "Bearer " + client.post("/test-token").json()["token"]}
+        client.get("/users", headers=headers)
+        
+        sub = f"new-login-{os.urandom(4).hex()}"
+        new_headers = {"Authorization": "Bearer " + create_jwt_token(
+            {"sub": sub, "email": f"{sub}@test.com", "name": "New Login"})}
+        assert client.get("/me", headers=new_headers).status_code == 200
+        
+        emails = {u["email"] for u in client.get("/users", headers=headers).json()["users"]}
+        assert f"{sub}@test.com" in emails
+
+class TestQueryBudget:
+    """Listing secrets must not issue a query per secret (N+1)"""
+    
+    def test_list_secrets_query_count_is_constant(self):
+        """Test that GET /secrets stays within a fixed query budget"""
+        # Two regular users: A creates secrets shared with B and the org
+        headers_a = {"Authorization": "Bearer " + create_jwt_token(
+            {"sub": "budget-a", "email": "budget-a@test.com", "name": "Budget A"})}
+        headers_b = {"Authorization": "Bearer " + create_jwt_token(
+            {"sub": "budget-b", "email": "budget-b@test.com", "name": "Budget B"})}
+        user_b = client.get("/me", headers=headers_b).json()["user"]
+        
+        def add_secrets(count):
+            for i in range(count):
+                response = client.post("/secrets", headers=headers_a, json={
+                    "key": f"BUDGET_{os.urandom(4).hex()}",
+                    "value": "v",
+                    "acl_entries": [
+                        {"subject_type": "user", "subject_id": user_b["id"]},
+                        {"subject_type": "org"}
+                    ]
+                })
+                assert response.status_code == 201
+        
+        def list_query_count():
+            with count_queries() as statements:
+                response = client.get("/secrets", headers=headers_a)
+            assert response.status_code == 200
+            return len(statements)
+        
+        # The list itself, then the shared users (no teams here)
+        add_secrets(2)
+        few = list_query_count()
+        add_secrets(5)
+        many = list_query_count()
+        
+        assert few <= 4
+        assert many == few
+
+
+class TestSchemaUpgrade:
+    """Startup can add the unique membership index to older databases"""
+    
+    def test_duplicate_memberships_are_removed_before_indexing(self):
+        """Test that startup keeps the oldest of duplicate memberships"""
+        index = next(i for i in TeamMembership.__table__.indexes if i.name == "ix_tm_user_team")
+        user_id, team_id = 900000 + int.from_bytes(os.urandom(2), "big"), 900001
+        
+        # An older database: no unique index, and the same membership twice
+        index.drop(engine, checkfirst=True)
+        try:
+            with new_session() as session:
+                session.add(TeamMembership(user_id=user_id, team_id=team_id))
+                session.add(TeamMembership(user_id=user_id, team_id=team_id))
+                session.commit()
+        finally:
+            app_main._create_schema()
+        
+        with new_session() as session:
+            rows = session.exec(select(TeamMembership).where(
+                TeamMembership.user_id == user_id, TeamMembership.team_id == team_id
+            )).all()
+            assert len(rows) == 1
+            session.delete(rows[0])
+            session.commit()
+        assert inspect(engine).has_index("teammembership", "ix_tm_user_team")
+
+
 if __name__ == "__main__":
     # Run all tests
     pytest.main([__file__, "-v", "--tb=short"])
\ No newline at end of file
@@ -94,6 +94,35 @@ def test_list_secrets_with_data():
     print_test("List secrets (with data)", passed, f"Found {len(response.json())} secrets")
     return passed
 
+def test_list_secrets_streamed():
+    """Test that streamed lists (NDJSON and JSON array) match the plain list"""
+    headers = {"Authorization": f"Bearer {TEST_TOKEN}"}
+    plain = requests.get(f"{BASE_URL}/secrets", headers=headers).json()
+    ndjson = requests.get(f"{BASE_URL}/secrets?stream=true", headers=headers)
+    array = requests.get(
+        f"{BASE_URL}/secrets?stream=true",
+        headers={**headers, "Accept": "application/json"}
+    )
+    lines = [json.loads(line) for line in ndjson.text.splitlines() if line]
+    
+    passed = lines == plain and array.json() == plain
+    print_test("Streamed list matches plain list", passed,
+               f"{len(lines)} NDJSON lines, {len(array.json())} array items")
+    return passed
+
+def test_list_secrets_without_values():
+    """Test that values=false lists the same secrets without their values"""
+    headers = {"Authorization": f"Bearer {TEST_TOKEN}"}
+    plain = requests.get(f"{BASE_URL}/secrets", headers=headers).json()
+    keys_only = requests.get(f"{BASE_URL}/secrets?values=false", headers=headers).json()
+    
+    passed = (
+        [s["key"] for s in keys_only] == [s["key"] for s in plain] and
+        all("value" not in s for s in keys_only)
+    )
+    print_test("List secrets without values", passed, f"{len(keys_only)} secrets")
+    return passed
+
 def test_get_specific_secret(secret_id: int):
     """Test getting a specific secret by ID"""
     headers = {"Authorization": f"Bearer {TEST_TOKEN}"}
@@ -113,6 +142,27 @@ def test_get_specific_secret(secret_id: int):
     print_test("Get specific secret", passed, f"Secret ID: {secret_id}")
     return passed
 
+def test_etag_not_modified(secret_id: int):
+    """Test that repeat reads with a matching ETag get 304 Not Modified"""
+    headers = {"Authorization": f"Bearer {TEST_TOKEN}"}
+    first = requests.get(f"{BASE_URL}/secrets/{secret_id}", headers=headers)
+    etag = first.headers.get("ETag")
+    
+    headers["If-None-Match"] = etag or ""
+    second = requests.get(f"{BASE_URL}/secrets/{secret_id}", headers=headers)
+    listing = requests.get(f"{BASE_URL}/secrets", headers={"Authorization": f"Bearer {TEST_TOKEN}"})
+    headers["If-None-Match"] = listing.headers.get("ETag", "")
+    relisting = requests.get(f"{BASE_URL}/secrets", headers=headers)
+    
+    passed = (
+        etag is not None and
+        second.status_code == 304 and
+        relisting.status_code == 304
+    )
+    print_test("ETag returns 304 when unchanged", passed,
+               f"Status: {second.status_code}, {relisting.status_code}")
+    return passed
+
 def test_update_secret_value(secret_id: int):
     """Test updating a secret's value"""
     headers = {
@@ -490,18 +540,18 @@ def run_extended_tests():
     # Test Performance
     print("\n=== Performance: Bulk Operations ===")
     try:
-        start_time = time.time()
+        start_time = time.perf_counter()
         for i in range(50):
             requests.post(
                 f"{BASE_URL}/secrets",
                 headers=headers,
                 json={"key": f"BULK_{i}", "value": f"bulk_value_{i}"}
             )
-        create_time = time.time() - start_time
+        create_time = time.perf_counter() - start_time
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         response = requests.get(f"{BASE_URL}/secrets", headers=headers)
-        list_time = time.time() - start_time
+        list_time = time.perf_counter() - start_time
         
         if response.status_code == 200:
             total_secrets = len(response.json())
@@ -547,7 +597,10 @@ def run_all_tests():
     secret_id = test_create_secret_basic()
     if secret_id:
         test_list_secrets_with_data()
+        test_list_secrets_streamed()
+        test_list_secrets_without_values()
         test_get_specific_secret(secret_id)
+        test_etag_not_modified(secret_id)
         test_update_secret_value(secret_id)
     
     test_search_secrets()
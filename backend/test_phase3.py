@@ -124,6 +124,19 @@ def test_team_creation():
     print_test("Prevent non-admin team creation", True, "Requires separate non-admin user")
     tests_passed += 1
     
+    # Test 4: Cached team list answers 304 until a team is created
+    tests_total += 1
+    listing = requests.get(f"{BASE_URL}/teams", headers=headers)
+    etag = listing.headers.get("ETag", "")
+    unchanged = requests.get(f"{BASE_URL}/teams", headers={**headers, "If-None-Match": etag})
+    requests.post(f"{BASE_URL}/teams?name=Cache_{int(time.time())}", headers=headers)
+    changed = requests.get(f"{BASE_URL}/teams", headers={**headers, "If-None-Match": etag})
+    passed = unchanged.status_code == 304 and changed.status_code == 200
+    print_test("Team list ETag changes after team creation", passed,
+               f"Status: {unchanged.status_code}, {changed.status_code}")
+    if passed:
+        tests_passed += 1
+    
     print(f"\n  Summary: {tests_passed}/{tests_total} tests passed")
     return tests_passed == tests_total
 
@@ -552,7 +565,11 @@ def test_data_consistency():
 # ============================================================================
 
 def test_performance():
-    """Test response times and performance"""
+    """
+    Test response times and performance
+    Only the request itself is timed (perf_counter; no printing or setup
+    inside the window), so the limits measure the server, not the terminal.
+    """
     print_section("Performance Tests")
     
     headers = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
@@ -561,9 +578,9 @@ def test_performance():
     
     # Test 1: List teams performance
     tests_total += 1
-    start_time = time.time()
+    start_time = time.perf_counter()
     response = requests.get(f"{BASE_URL}/teams", headers=headers)
-    elapsed = time.time() - start_time
+    elapsed = time.perf_counter() - start_time
     
     passed = response.status_code == 200 and elapsed < 1.0  # Should respond in under 1 second
     print_test("List teams performance", passed, f"Response time: {elapsed:.3f}s")
@@ -572,9 +589,9 @@ def test_performance():
     
     # Test 2: List secrets with permissions performance
     tests_total += 1
-    start_time = time.time()
+    start_time = time.perf_counter()
     response = requests.get(f"{BASE_URL}/secrets", headers=headers)
-    elapsed = time.time() - start_time
+    elapsed = time.perf_counter() - start_time
     
     passed = response.status_code == 200 and elapsed < 1.0
     print_test("List secrets performance", passed, f"Response time: {elapsed:.3f}s")
@@ -583,14 +600,14 @@ def test_performance():
     
     # Test 3: Create secret performance
     tests_total += 1
-    start_time = time.time()
     secret_data = {
         "key": f"perf_test_{int(time.time())}",
         "value": "performance test",
         "acl_entries": []
     }
+    start_time = time.perf_counter()
     response = requests.post(f"{BASE_URL}/secrets", headers=headers, json=secret_data)
-    elapsed = time.time() - start_time
+    elapsed = time.perf_counter() - start_time
     
     passed = response.status_code == 201 and elapsed < 1.0
     print_test("Create secret performance", passed, f"Response time: {elapsed:.3f}s")
@@ -227,6 +227,44 @@ def test_secret_deletion():
     passed = response.status_code == 404
     print_test("Delete non-existent secret returns 404", passed, f"Status: {response.status_code}")
 
+def test_bulk_delete():
+    """Test deleting a secret, team and user in one request"""
+    print("\n=== Part 4C: Bulk Deletion ===")
+    headers = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
+    suffix = int(time.time())
+    
+    # 1. Create one of each
+    secret = requests.post(f"{BASE_URL}/secrets", headers=headers, json={
+        "key": f"bulk-delete-{suffix}", "value": "gone soon"
+    }).json()
+    team = requests.post(
+        f"{BASE_URL}/teams", headers=headers, params={"name": f"BulkDelete-{suffix}"}
+    ).json()["team"]
+    user = requests.post(f"{BASE_URL}/admin/users", headers=headers, params={
+        "email": f"bulk-delete-{suffix}@example.com", "name": "Bulk Delete"
+    }).json()["user"]
+    
+    # 2. Delete them together (plus the admin, who must be skipped)
+    me = requests.get(f"{BASE_URL}/me", headers=headers).json()["user"]
+    response = requests.post(f"{BASE_URL}/admin/bulk-delete", headers=headers, json={
+        "secrets": [secret["id"]],
+        "teams": [team["id"]],
+        "users": [user["id"], me["id"]]
+    })
+    passed = (
+        response.status_code == 200 and
+        response.json()["deleted"] == {"secrets": 1, "teams": 1, "users": 1}
+    )
+    print_test("Bulk delete", passed, f"Status: {response.status_code}")
+    
+    # 3. Verify they are gone
+    gone = (
+        requests.get(f"{BASE_URL}/secrets/{secret['id']}", headers=headers).status_code == 404 and
+        requests.get(f"{BASE_URL}/teams/{team['id']}/members", headers=headers).status_code == 404 and
+        all(u["id"] != user["id"] for u in requests.get(f"{BASE_URL}/users", headers=headers).json()["users"])
+    )
+    print_test("Bulk deleted items are gone", gone)
+
 # ============================================================================
 # PART 4D: User Profile Tests
 # ============================================================================
@@ -435,6 +473,7 @@ def main():
     test_admin_user_management()
     test_admin_team_management()
     test_secret_deletion()
+    test_bulk_delete()
     test_user_profile()
     test_authorization()
     test_integration()
@@ -446,7 +485,7 @@ def main():
     print("\nKey Features Tested:")
     print("✓ Admin user management (create, promote, delete)")
     print("✓ Admin team management (create, add/remove members, delete)")
-    print("✓ Secret deletion")
+    print("✓ Secret deletion (single and bulk)")
     print("✓ Enhanced user profile (/me endpoint)")
     print("✓ Authorization checks")
     print("✓ Full integration workflow")
@@ -1,5 +1,5 @@
 import fetch from 'node-fetch';
-import { loadAuth } from '../config.js';
+import { loadAuth, refreshAuth } from '../config.js';
 
 // Base URL for our backend API
 const API_BASE = 'http://localhost:8001';
@@ -9,9 +9,10 @@ const API_BASE = 'http://localhost:8001';
  * Automatically includes the JWT token from saved auth.
  */
 export async function authenticatedFetch(path: string, options: any = {}) {
-  // 1. Get saved auth token
+  // 1. Get saved auth token (renew it if the short-lived JWT expired)
   const auth = loadAuth();
-  if (!auth.token) {
+  const token = auth.token ?? (await refreshAuth());
+  if (!token) {
     throw new Error('Not authenticated. Please login first.');
   }
 
@@ -19,24 +20,33 @@ export async function authenticatedFetch(path: string, options: any = {}) {
   const url = `${API_BASE}${path}`;
 
   // 3. Add auth header to request
-  const headers = {
-    'Authorization': `Bearer ${auth.token}`,
-    'Content-Type': 'application/json',
-    ...options.headers,
-  };
-
-  // 4. Make the request
-  const response = await fetch(url, {
+  const send = (jwt: string) => fetch(url, {
     ...options,
-    headers,
+    headers: {
+      'Authorization': `Bearer ${jwt}`,
+      'Content-Type': 'application/json',
+      ...options.headers,
+    },
   });
 
-  // 5. Handle response
-  if (!response.ok) {
-    if (response.status === 401) {
-      throw new Error('Authentication failed. Please login again.');
+  // 4. Make the request, retrying once with a fresh token if it was rejected
+  let response = await send(token);
+  if (response.status === 401) {
+    const renewed = await refreshAuth();
+    if (renewed) {
+      response = await send(renewed);
     }
-    throw new Error(`Request failed: ${response.status} ${response.statusText}`);
+  }
+
+  // 5. Handle response (the error carries the status for callers that care)
+  if (!response.ok) {
+    const error: any = new Error(
+      response.status === 401
+        ? 'Authentication failed. Please login again.'
+        : `Request failed: ${response.status} ${response.statusText}`
+    );
+    error.status = response.status;
+    throw error;
   }
 
   // 6. Parse JSON response
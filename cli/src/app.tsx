@@ -7,10 +7,11 @@ import TextInput from "ink-text-input"; // Part 2E: Text input for creating secr
 import open from "open"; // Part 1G: Opens browser
 import fetch from "node-fetch"; // Part 1G: HTTP requests
 import { v4 as uuidv4 } from "uuid"; // Part 1G: Generate unique tokens
-import { saveAuth, loadAuth, clearAuth, getConfigPath } from "./config.js"; // Part 1H: Token persistence
+import { saveAuth, loadAuth, clearAuth, getConfigPath, refreshAuth } from "./config.js"; // Part 1H: Token persistence
 import { TeamsScreen } from "./screens/Teams.js"; // Phase 3D: Teams management screen
 import { AdminScreen } from "./screens/Admin.js"; // Phase 4: Admin panel
 import { ProfileScreen } from "./screens/Profile.js"; // Phase 4: User profile
+import { authenticatedFetch } from "./api/client.js"; // Renews the short-lived JWT as needed
 
 // Phase 3E: Enhanced TypeScript interface for our secret data
 interface Secret {
@@ -86,25 +87,18 @@ const SecretsScreen = ({
     }
 
     try {
-      // 4b. Call our backend API to get secrets
-      const response = await fetch("http://localhost:8001/secrets", {
-        headers: {
-          Authorization: `Bearer ${token}`, // Send JWT token for auth
-        },
-      });
-
-      // 4c. Handle the response
-      if (response.ok) {
-        const data = (await response.json()) as Secret[];
-        setSecrets(data); // Save secrets to state
-      } else if (response.status === 401) {
+      // 4b. Call our backend API to get secrets (JWT sent and renewed for us)
+      const data = (await authenticatedFetch("/secrets")) as Secret[];
+      setSecrets(data); // Save secrets to state
+    } catch (err: any) {
+      // 4c. Handle auth, API and network errors
+      if (err.status === 401) {
         setError("Authentication failed. Please login again.");
-      } else {
+      } else if (err.status) {
         setError("[ERROR] Unable to retrieve secrets");
+      } else {
+        setError("Network error. Is the backend running?");
       }
-    } catch (err) {
-      // 4d. Handle network errors
-      setError("Network error. Is the backend running?");
     } finally {
       setLoading(false); // Stop showing spinner
     }
@@ -115,16 +109,8 @@ const SecretsScreen = ({
     if (!token) return;
     
     try {
-      const response = await fetch("http://localhost:8001/teams/mine", {
-        headers: {
-          Authorization: `Bearer ${token}`,
-        },
-      });
-      
-      if (response.ok) {
-        const data = await response.json() as { teams: any[] };
-        setUserTeams(data.teams || []);
-      }
+      const data = (await authenticatedFetch("/teams/mine")) as { teams: any[] };
+      setUserTeams(data.teams || []);
     } catch (err) {
       // Silently fail - teams are optional for sharing
     }
@@ -160,12 +146,8 @@ const SecretsScreen = ({
 
     try {
       // 5a. Send POST request to create secret with ACL
-      const response = await fetch("http://localhost:8001/secrets", {
+      await authenticatedFetch("/secrets", {
         method: "POST",
-        headers: {
-          Authorization: `Bearer ${token}`,
-          "Content-Type": "application/json",
-        },
         body: JSON.stringify({ 
           key: newKey, 
           value: newValue,
@@ -174,19 +156,15 @@ const SecretsScreen = ({
       });
 
       // 5b. If successful, reset form and refresh list
-      if (response.ok) {
-        setNewKey("");
-        setNewValue("");
-        setSharingChoice("private");
-        setGrantWrite(false);
-        setMode("list"); // Go back to list view
-        setCreateStep("key");
-        await fetchSecrets(); // Refresh the list
-      } else {
-        setError("[ERROR] Unable to create secret");
-      }
-    } catch (err) {
-      setError("Network error");
+      setNewKey("");
+      setNewValue("");
+      setSharingChoice("private");
+      setGrantWrite(false);
+      setMode("list"); // Go back to list view
+      setCreateStep("key");
+      await fetchSecrets(); // Refresh the list
+    } catch (err: any) {
+      setError(err.status ? "[ERROR] Unable to create secret" : "Network error");
     }
   };
 
@@ -196,25 +174,21 @@ const SecretsScreen = ({
 
     try {
       // 1. Send DELETE request to backend
-      const response = await fetch(`http://localhost:8001/secrets/${secret.id}`, {
-        method: "DELETE",
-        headers: {
-          Authorization: `Bearer ${token}`,
-        },
-      });
-
-      // 2. Handle response
-      if (response.ok) {
-        setMode("list"); // Go back to list
-        setDeleteTarget(null);
-        await fetchSecrets(); // Refresh the list
-      } else if (response.status === 403) {
+      await authenticatedFetch(`/secrets/${secret.id}`, { method: "DELETE" });
+
+      // 2. Go back to the refreshed list
+      setMode("list");
+      setDeleteTarget(null);
+      await fetchSecrets();
+    } catch (err: any) {
+      // 3. Handle errors
+      if (err.status === 403) {
         setError("You can only delete secrets you created");
-      } else {
+      } else if (err.status) {
         setError("[ERROR] Unable to delete secret");
+      } else {
+        setError("Network error");
       }
-    } catch (err) {
-      setError("Network error");
     }
   };
 
@@ -548,6 +522,15 @@ const App = () => {
       console.log(
         `Welcome back, ${savedAuth.user.name || savedAuth.user.login}!`
       );
+    } else {
+      // JWT expired - try to renew it with the saved refresh token
+      refreshAuth().then((renewed) => {
+        const auth = loadAuth();
+        if (renewed && auth.user) {
+          setToken(renewed);
+          setUser(auth.user);
+        }
+      });
     }
     // Show where config is stored (for debugging)
     console.log(`Config stored at: ${getConfigPath()}`);
@@ -640,13 +623,13 @@ const App = () => {
 
       if (response.ok) {
         // 5a. Success! Got the token
-        const data = (await response.json()) as { token: string; user: any };
+        const data = (await response.json()) as { token: string; refresh_token?: string; user: any };
         setUser(data.user);
         setToken(data.token);
         setLoginStatus("success");
 
         // Phase 1H: Save auth to disk
-        saveAuth(data.token, data.user);
+        saveAuth(data.token, data.user, data.refresh_token);
 
         // 5b. Go back to menu after 2 seconds
         setTimeout(() => setScreen("menu"), 2000);
@@ -3,6 +3,7 @@
 // so users don't have to login every time they run the CLI
 
 import Conf from "conf";
+import fetch from "node-fetch";
 
 // 1. Create a persistent configuration store using the 'conf' library
 // This automatically creates a config file at ~/.config/secret-cli/config.json
@@ -14,6 +15,9 @@ const config = new Conf({
     token: {
       type: "string", // JWT token must be a string
     },
+    refreshToken: {
+      type: "string", // Long-lived token used to get a new JWT when it expires
+    },
     user: {
       type: "object", // User info is an object with these properties:
       properties: {
@@ -28,10 +32,13 @@ const config = new Conf({
 
 // 2. Save authentication data to disk for future CLI sessions
 // This is called after successful OAuth login to remember the user
-export function saveAuth(token: string, user: any): void {
+export function saveAuth(token: string, user: any, refreshToken?: string | null): void {
   // Use conf library to save data - it handles file writing automatically
   config.set("token", token); // Save the JWT token for API calls
   config.set("user", user); // Save user profile info for display
+  if (refreshToken) {
+    config.set("refreshToken", refreshToken); // Save refresh token to renew the JWT
+  }
   console.log("✅ Session saved to disk");
 }
 
@@ -56,8 +63,8 @@ export function loadAuth(): { token: string | null; user: any | null } {
       if (expiry > new Date()) {
         // Token is still good, return the saved data
         return { token, user };
-      } else {
-        // Token has expired, clean it up and ask user to login again
+      } else if (!config.get("refreshToken")) {
+        // Token has expired and can't be renewed, clean it up and ask user to login again
         clearAuth(); // Remove expired data from disk
         console.log("⚠️  Saved token expired, please login again");
       }
@@ -71,11 +78,61 @@ export function loadAuth(): { token: string | null; user: any | null } {
 // 5. Clear all saved authentication data from disk
 // This is called when user logs out to ensure clean session termination
 export function clearAuth(): void {
-  // Remove both token and user data from the config file
+  // Remove tokens and user data from the config file
   config.delete("token"); // Delete the JWT token
+  config.delete("refreshToken"); // Delete the refresh token
   config.delete("user"); // Delete the user profile
 }
 
+// 5b. Trade the saved refresh token for a new short-lived JWT
+// Access tokens expire after 15 minutes; this keeps the session alive
+// Returns the new JWT, or null if the user has to login again
+// Refresh tokens work once, so callers that hit an expired JWT at the same
+// time (e.g. a screen loading two lists in parallel) share one refresh
+let refreshInFlight: Promise<string | null> | null = null;
+
+export function refreshAuth(): Promise<string | null> {
+  if (!refreshInFlight) {
+    refreshInFlight = renewToken().finally(() => {
+      refreshInFlight = null;
+    });
+  }
+  return refreshInFlight;
+}
+
+async function renewToken(): Promise<string | null> {
+  const refreshToken = config.get("refreshToken") as string | undefined;
+  const user = config.get("user") as any | undefined;
+  if (!refreshToken || !user) return null;
+
+  try {
+    const response = await fetch("http://localhost:8001/auth/refresh", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ refresh_token: refreshToken }),
+    });
+
+    if (!response.ok) {
+      // Another CLI process may have rotated the token while we were asking;
+      // then its new session is saved and still good
+      if (config.get("refreshToken") !== refreshToken) {
+        return (config.get("token") as string | undefined) ?? null;
+      }
+      // Refresh token expired or already used - session is over
+      clearAuth();
+      return null;
+    }
+
+    const data = (await response.json()) as { token: string; refresh_token: string };
+    config.set("token", data.token);
+    config.set("refreshToken", data.refresh_token);
+    return data.token;
+  } catch {
+    // Backend unreachable - keep the refresh token for next time
+    return null;
+  }
+}
+
 // 6. Get the file system path where configuration is stored
 // This is useful for debugging and showing users where their data is saved
 export function getConfigPath(): string {
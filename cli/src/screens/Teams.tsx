@@ -16,7 +16,6 @@ interface TeamMember {
   id: number;
   name: string;
   email: string;
-  github_id: string;
   is_admin: boolean;
 }
 